@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from classes import State, Tile, Board
+from fleet import FLEET, random_fleet
+from typing import Any, Callable, Optional
+
+
+# draw_board is measured without any window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+
+SIZES: tuple[int, ...] = (8, 64, 256, 1024, 2048)
+"""The default widths (and heights) of the measured boards"""
+DENSITIES: tuple[float, ...] = (0.05, 0.3)
+"""The default proportions of the tiles that contain a boat"""
+BOAT_LENGTH: int = 4
+"""The length of the boats of the measured boards"""
+NEW_BOAT_ID: int = 10 ** 9
+"""The first id of the boats added while measuring, above the ids of the boats of the measured boards"""
+
+
+def fleet_board(size: tuple[int, int], density: float, packed: bool, seed: int = 0) -> Board:
+    """Returns a board where horizontal boats of `BOAT_LENGTH` tiles, separated by at least one tile, cover about the given proportion of the tiles
+
+    Parameters
+    ----------
+
+    - size: the width and the height of the board
+
+    - density: the proportion of the tiles that contain a boat
+
+    - packed: whether the board stores its tiles in packed planes
+
+    - seed: the seed of the random placement of the boats"""
+    rng: random.Random = random.Random(seed)
+    board: Board = Board(size, packed)
+    probability: float = min(1.0, density * (BOAT_LENGTH + 1) / BOAT_LENGTH)
+    boat_id: int = 0
+    for y in range(size[1]):
+        for x in range(0, size[0] - BOAT_LENGTH + 1, BOAT_LENGTH + 1):
+            if rng.random() < probability:
+                for i in range(BOAT_LENGTH):
+                    board.set_tile_at(Tile(boat_id, State.NOTSEEN), (x + i, y))
+                boat_id += 1
+    return board
+
+
+def positions(size: tuple[int, int], count: int, seed: int) -> list[tuple[int, int]]:
+    """Returns the given number of random positions on a board of the given size"""
+    rng: random.Random = random.Random(seed)
+    return [(rng.randrange(size[0]), rng.randrange(size[1])) for i in range(count)]
+
+
+def save_tiles(board: Board, tiles: list[tuple[int, int]]) -> list[tuple[tuple[int, int], Tile]]:
+    """Returns the given tiles of the given board, to put them back with `restore_tiles`"""
+    return [(pos, board.get_tile_at(pos)) for pos in tiles]
+
+
+def restore_tiles(board: Board, saved: list[tuple[tuple[int, int], Tile]]) -> None:
+    """Puts back tiles saved with `save_tiles` on the given board"""
+    for pos, tile in saved:
+        board.set_tile_at(tile, pos)
+
+
+def measure(setup: Callable[[], Any], run: Callable[[Any], int], teardown: Callable[[Any], None], repeat: int) -> dict[str, float]:
+    """Returns the median and the best time in seconds of one call, `run` being timed `repeat` times. Neither `setup` nor `teardown` is timed
+
+    Parameters
+    ----------
+
+    - setup: returns the state given to `run` and `teardown`
+
+    - run: performs the measured calls on the given state and returns how many calls it made
+
+    - teardown: undoes what `run` changed, so that building the measured board again is never needed
+
+    - repeat: the number of times `run` is timed"""
+    times: list[float] = []
+    for i in range(repeat):
+        state: Any = setup()
+        start: float = time.perf_counter()
+        calls: int = run(state)
+        times.append((time.perf_counter() - start) / calls)
+        teardown(state)
+    return {"median": statistics.median(times), "best": min(times)}
+
+
+Benchmark = tuple[Callable[[], Any], Callable[[Any], int], Callable[[Any], None]]
+"""The setup, run and teardown functions of a measure (see `measure`)"""
+
+
+def board_benchmarks(board: Board) -> dict[str, Benchmark]:
+    """Returns the benchmarks of each operation of the given board, which is left unchanged by all of them"""
+    size: tuple[int, int] = board.size()
+    packed: bool = board.is_packed()
+    targets: list[tuple[int, int]] = positions(size, 1000, 1)
+    boat_ids: list[int] = sorted(board.get_boats())[:100]
+
+    def nothing(state: Any) -> None:
+        pass
+
+    def save_targets() -> list[tuple[tuple[int, int], Tile]]:
+        return save_tiles(board, targets)
+
+    def restore(state: list[tuple[tuple[int, int], Tile]]) -> None:
+        restore_tiles(board, state)
+
+    def construct(state: None) -> int:
+        Board(size, packed)
+        return 1
+
+    def set_tile_at(state: Any) -> int:
+        for i, pos in enumerate(targets):
+            board.set_tile_at(Tile(None if i % 2 else NEW_BOAT_ID + i, State.NOTSEEN), pos)
+        return len(targets)
+
+    def restore_set(state: list[tuple[tuple[int, int], Tile]]) -> None:
+        restore_tiles(board, state)
+        # overwritten boats are kept by the board
+        for boat_id in board.get_boats():
+            if boat_id >= NEW_BOAT_ID:
+                board.del_boat(boat_id)
+
+    def guess_tile(state: Any) -> int:
+        for pos in targets:
+            board.guess_tile(pos)
+        return len(targets)
+
+    def is_finished(state: None) -> int:
+        for i in range(100):
+            board.is_finished()
+        return 100
+
+    def save_boats() -> list[tuple[tuple[int, int], Tile]]:
+        return save_tiles(board, [pos for boat_id in boat_ids for pos in sorted(board.get_boat_tiles(boat_id))])
+
+    def del_boat(state: Any) -> int:
+        for boat_id in boat_ids:
+            board.del_boat(boat_id)
+        return max(len(boat_ids), 1)
+
+    def rows(state: None) -> int:
+        for i in range(10):
+            board.add_row()
+            board.del_row()
+        return 10
+
+    def save_row() -> list[tuple[tuple[int, int], Tile]]:
+        return save_tiles(board, [(x, size[1] - 1) for x in range(size[0])])
+
+    def del_row(state: Any) -> int:
+        board.del_row()
+        return 1
+
+    def restore_row(state: list[tuple[tuple[int, int], Tile]]) -> None:
+        board.add_row()
+        restore_tiles(board, state)
+
+    def columns(state: None) -> int:
+        for i in range(10):
+            board.add_column()
+            board.del_column()
+        return 10
+
+    def save_column() -> list[tuple[tuple[int, int], Tile]]:
+        return save_tiles(board, [(size[0] - 1, y) for y in range(size[1])])
+
+    def del_column(state: Any) -> int:
+        board.del_column()
+        return 1
+
+    def restore_column(state: list[tuple[tuple[int, int], Tile]]) -> None:
+        board.add_column()
+        restore_tiles(board, state)
+
+    def fleets(state: None) -> int:
+        rng: random.Random = random.Random(0)
+        for i in range(100):
+            random_fleet(size, FLEET, rng)
+        return 100
+
+    def get_grid(state: None) -> int:
+        board.get_grid()
+        return 1
+
+    def representation(state: None) -> int:
+        repr(board)
+        return 1
+
+    return {
+        "construct": (lambda: None, construct, nothing),
+        "set_tile_at": (save_targets, set_tile_at, restore_set),
+        "guess_tile": (save_targets, guess_tile, restore),
+        "is_finished": (lambda: None, is_finished, nothing),
+        "del_boat": (save_boats, del_boat, restore),
+        "add_row+del_row": (lambda: None, rows, nothing),
+        "del_row": (save_row, del_row, restore_row),
+        "add_column+del_column": (lambda: None, columns, nothing),
+        "del_column": (save_column, del_column, restore_column),
+        "random_fleet": (lambda: None, fleets, nothing),
+        "get_grid": (lambda: None, get_grid, nothing),
+        "__repr__": (lambda: None, representation, nothing),
+    }
+
+
+def draw_benchmarks(board: Board) -> dict[str, Benchmark]:
+    """Returns the benchmarks of the drawing of a frame of the given board on a 1920 by 1080 screen. The board is left unchanged by all of them"""
+    import pygame as pg
+    import main
+
+    pg.display.init()
+    screen: pg.Surface = pg.display.set_mode((1920, 1080))
+    ds: main.Ds = main.Ds(0, 0, 0, 0)
+    ds.update(board, screen, False)
+    targets: list[tuple[int, int]] = positions(board.size(), 100, 2)
+
+    def draw_board(state: None) -> int:
+        main.draw_board(board, screen, ds, False)
+        return 1
+
+    def renderer() -> tuple[main.BoardRenderer, list[tuple[tuple[int, int], Tile]]]:
+        renderer: main.BoardRenderer = main.BoardRenderer(board, screen, ds, (0, 0, 0))
+        renderer.draw(False)
+        return (renderer, save_tiles(board, targets))
+
+    def guess_frame(state: tuple[main.BoardRenderer, list[tuple[tuple[int, int], Tile]]]) -> int:
+        for pos in targets:
+            board.guess_tile(pos)
+            state[0].mark_guess(pos)
+            state[0].draw(False)
+        return len(targets)
+
+    return {
+        "draw_board": (lambda: None, draw_board, lambda state: None),
+        "renderer_guess_frame": (renderer, guess_frame, lambda state: restore_tiles(board, state[1])),
+    }
+
+
+def run(sizes: tuple[int, ...], densities: tuple[float, ...], draw: bool, log: Optional[Callable[[str], None]] = None) -> dict[str, Any]:
+    """Runs the benchmarks and returns their results
+
+    Parameters
+    ----------
+
+    - sizes: the widths (and heights) of the measured boards
+
+    - densities: the proportions of the tiles that contain a boat
+
+    - draw: whether drawing is measured too (requires pygame)
+
+    - log: called with a line of text after each measure"""
+    results: list[dict[str, Any]] = []
+    for side in sizes:
+        size: tuple[int, int] = (side, side)
+        # keeps the biggest boards from taking ages
+        repeat: int = 5 if side * side <= 256 * 256 else 3
+        for density in densities:
+            for packed in (False, True):
+                board: Board = fleet_board(size, density, packed)
+                benchmarks: dict[str, Benchmark] = board_benchmarks(board)
+                if draw:
+                    benchmarks.update(draw_benchmarks(board))
+                for name, (setup, function, teardown) in benchmarks.items():
+                    result: dict[str, Any] = {"benchmark": name, "size": list(size), "density": density, "packed": packed}
+                    result.update(measure(setup, function, teardown, repeat))
+                    results.append(result)
+                    if log is not None:
+                        log(f"{name:<22} {side:>5}x{side:<5} density {density:<5} {'packed' if packed else 'tiles ':<6} {result['median'] * 1e6:>14.2f} us")
+    return {"meta": metadata(), "results": results}
+
+
+def metadata() -> dict[str, Any]:
+    """Returns what describes the environment of a run"""
+    try:
+        commit: Optional[str] = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit: Optional[str] = None
+    try:
+        import numpy
+        numpy_version: Optional[str] = numpy.__version__
+    except ImportError:
+        numpy_version: Optional[str] = None
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": numpy_version,
+    }
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """Returns a line of text for each measure that is slower than in the given baseline by more than the given ratio"""
+    def key(result: dict[str, Any]) -> tuple:
+        return (result["benchmark"], tuple(result["size"]), result["density"], result["packed"])
+    previous: dict[tuple, dict[str, Any]] = {key(result): result for result in baseline["results"]}
+    lines: list[str] = []
+    for result in results["results"]:
+        if key(result) in previous:
+            ratio: float = result["median"] / previous[key(result)]["median"]
+            if ratio > threshold:
+                name, size, density, packed = key(result)
+                lines.append(f"REGRESSION {name} {size[0]}x{size[1]} density {density} {'packed' if packed else 'tiles'}: {ratio:.2f}x slower")
+    return lines
+
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Measures the board operations and the drawing of frames at various scales")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, metavar="SIDE", help=f"the widths (and heights) of the boards (default: {' '.join(map(str, SIZES))})")
+    parser.add_argument("--densities", type=float, nargs="+", default=DENSITIES, metavar="DENSITY", help=f"the proportions of the tiles that contain a boat (default: {' '.join(map(str, DENSITIES))})")
+    parser.add_argument("--no-draw", action="store_true", help="do not measure drawing (which requires pygame)")
+    parser.add_argument("--output", default="benchmark.json", help="the JSON file to write the results to (default: benchmark.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="a JSON file of previous results to report regressions against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="the slowdown ratio reported as a regression (default: 1.2)")
+    args: argparse.Namespace = parser.parse_args()
+    results: dict[str, Any] = run(tuple(args.sizes), tuple(args.densities), not args.no_draw, lambda line: print(line, file=sys.stderr))
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    if args.compare is not None:
+        with open(args.compare) as file:
+            regressions: list[str] = compare(results, json.load(file), args.threshold)
+        print("\n".join(regressions) if regressions else "No regression", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+from __future__ import annotations
+import os
+import struct
+import sys
+import tempfile
+
+from array import array
+from classes import State, Board, optional_import
+
+
+np = optional_import("numpy")
+
+
+# Binary board file, all values being little-endian:
+#
+# - header (`HEADER`): magic, version, flags, width, height, number of boats and size in bytes of a boat id
+# - boats table (`BOAT`): for each boat, its id and its state
+# - ids plane: the boat id of each tile, line by line, as signed integers of the size given by the header (`NO_BOAT` for tiles without boat). Starts on a multiple of 8 bytes so that it can be memory-mapped as is
+# - seen bits: whether each tile has been seen, line by line, 8 tiles per byte (most significant bit first)
+
+MAGIC: bytes = b"BSHP"
+"""The first bytes of a board file"""
+VERSION: int = 1
+"""The version of the format written by `save_board`"""
+HEADER: struct.Struct = struct.Struct("<4sHHIIIB11x")
+BOAT: struct.Struct = struct.Struct("<qB7x")
+STARTED: int = 1
+"""The flag of the boards saved while being guessed (as opposed to boards saved from the menu)"""
+ID_TYPECODES: dict[int, str] = {size: code for code in "qlihb" for size in [array(code).itemsize]}
+"""The `array.array` type code of the signed integers of each size in bytes"""
+
+
+class Header:
+    """The description of a board file"""
+    def __init__(self, version: int, flags: int, size: tuple[int, int], boat_count: int, id_size: int) -> None:
+        self.version: int = version
+        self.flags: int = flags
+        self.size: tuple[int, int] = size
+        """The width and the height of the board"""
+        self.boat_count: int = boat_count
+        self.id_size: int = id_size
+        """The size in bytes of each boat id of the ids plane"""
+
+    def __repr__(self) -> str:
+        return f"Header(version={self.version}, flags={self.flags}, size={self.size}, boat_count={self.boat_count}, id_size={self.id_size})"
+
+    def is_started(self) -> bool:
+        """Returns whether the board was saved while being guessed"""
+        return bool(self.flags & STARTED)
+
+    def ids_offset(self) -> int:
+        """Returns the position in bytes of the ids plane in the file"""
+        offset: int = HEADER.size + self.boat_count * BOAT.size
+        return offset + (-offset) % 8
+
+    def bits_offset(self) -> int:
+        """Returns the position in bytes of the seen bits in the file"""
+        return self.ids_offset() + self.size[0] * self.size[1] * self.id_size
+
+
+def read_header(path: str) -> Header:
+    """Returns the header of the board file at the given path"""
+    with open(path, "rb") as file:
+        return parse_header(file.read(HEADER.size))
+
+
+def parse_header(data: bytes) -> Header:
+    """Returns the header at the beginning of the given bytes. Raises a `ValueError` if they are not a supported board file"""
+    if len(data) < HEADER.size:
+        raise ValueError("Not a board file: too short")
+    magic, version, flags, width, height, boat_count, id_size = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"Not a board file: starts with {magic!r}")
+    if version != VERSION:
+        raise ValueError(f"Unsupported board file version: {version}; supported: {VERSION}")
+    if id_size not in (1, 2, 4, 8):
+        raise ValueError(f"Invalid boat id size: {id_size}")
+    return Header(version, flags, (width, height), boat_count, id_size)
+
+
+def id_size_for(boat_ids) -> int:
+    """Returns the smallest size in bytes of the signed integers that can hold the given boat ids and `NO_BOAT`"""
+    highest: int = max(boat_ids, default=0)
+    for size in (1, 2, 4):
+        if highest < 2 ** (8 * size - 1):
+            return size
+    return 8
+
+
+def dumps_board(board: Board, started: bool = False) -> bytes:
+    """Returns the given board in the board file format (see `save_board`)"""
+    width, height = board.size()
+    boats: dict[int, State] = board.get_boats()
+    if any(boat_id < 0 for boat_id in boats):
+        raise ValueError("Board files only support non-negative boat ids")
+    id_size: int = id_size_for(boats)
+    header: Header = Header(VERSION, STARTED if started else 0, (width, height), len(boats), id_size)
+    chunks: list[bytes] = [HEADER.pack(MAGIC, VERSION, header.flags, width, height, len(boats), id_size)]
+    chunks.extend(BOAT.pack(boat_id, state.value) for boat_id, state in boats.items())
+    chunks.append(bytes(header.ids_offset() - HEADER.size - len(boats) * BOAT.size))
+    ids = board.get_id_plane()
+    states = board.get_state_plane()
+    if np is not None:
+        chunks.append(np.asarray(ids, dtype=f"<i{id_size}").tobytes())
+        chunks.append(np.packbits(np.asarray(states, dtype=np.bool_)).tobytes())
+    else:
+        if not board.is_packed():
+            # the planes are lists of lines
+            ids = [boat_id for line in ids for boat_id in line]
+            states = [seen for line in states for seen in line]
+        plane: array = array(ID_TYPECODES[id_size], ids)
+        if sys.byteorder == "big":
+            plane.byteswap()
+        chunks.append(plane.tobytes())
+        bits: bytearray = bytearray((width * height + 7) // 8)
+        for i, seen in enumerate(states):
+            if seen:
+                bits[i // 8] |= 0x80 >> (i % 8)
+        chunks.append(bytes(bits))
+    return b"".join(chunks)
+
+
+def save_board(board: Board, path: str, started: bool = False) -> None:
+    """Writes the given board to a file at the given path. The file is replaced at once so that boards memory-mapped from the previous file stay valid (they are not memory-mapped on Windows, see `load_board`). Raises an `OSError` if the file cannot be written
+
+    Parameters
+    ----------
+
+    - board: the board to save
+
+    - path: the path of the file
+
+    - started: whether the board is being guessed (see `Header.is_started`)"""
+    directory: str = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=".board-")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(dumps_board(board, started))
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def load_board(path: str, mmap: bool = True) -> Board:
+    """Returns the board saved in the file at the given path, which is always a packed board (see `Board.from_planes`)
+
+    Parameters
+    ----------
+
+    - path: the path of the file
+
+    - mmap: whether the ids plane is memory-mapped instead of being copied in memory. The plane is still read once to index the boats (see `Board.from_planes`) and the seen bits are always read and unpacked (see `plane_board`). The mapping is copy-on-write: changing the board never changes the file. Requires numpy. Ignored on Windows, where a mapped file cannot be replaced, so that the board could not be saved again to the file it was loaded from (see `save_board`)"""
+    if mmap and np is not None and os.name != "nt":
+        header: Header = read_header(path)
+        with open(path, "rb") as file:
+            prefix: bytes = file.read(header.ids_offset())
+            file.seek(header.bits_offset())
+            bits: bytes = file.read()
+        width, height = header.size
+        ids = np.memmap(path, dtype=f"<i{header.id_size}", mode="c", offset=header.ids_offset(), shape=(height, width))
+        return plane_board(header, prefix, ids, bits)
+    with open(path, "rb") as file:
+        return loads_board(file.read())
+
+
+def loads_board(data: bytes) -> Board:
+    """Returns the board in the given bytes, in the board file format (see `save_board`)"""
+    header: Header = parse_header(data)
+    width, height = header.size
+    ids_data: bytes = data[header.ids_offset():header.bits_offset()]
+    if np is not None:
+        ids = np.frombuffer(ids_data, dtype=f"<i{header.id_size}").reshape((height, width)).copy()
+    else:
+        ids: array = array(ID_TYPECODES[header.id_size], ids_data)
+        if sys.byteorder == "big":
+            ids.byteswap()
+        ids = array("q", ids)
+    return plane_board(header, data, ids, data[header.bits_offset():])
+
+
+def plane_board(header: Header, data: bytes, ids, bits: bytes) -> Board:
+    """Returns the board of the given header and ids plane. The seen bits are unpacked into a plane of one byte per tile
+
+    Parameters
+    ----------
+
+    - header: the header of the file
+
+    - data: the beginning of the file, up to the boats table included
+
+    - ids: the ids plane, already read
+
+    - bits: the seen bits"""
+    width, height = header.size
+    if len(bits) < (width * height + 7) // 8:
+        raise ValueError("Truncated board file")
+    table: memoryview = memoryview(data)[HEADER.size:HEADER.size + header.boat_count * BOAT.size]
+    boats: dict[int, State] = {boat_id: State.SEEN if seen else State.NOTSEEN for boat_id, seen in BOAT.iter_unpack(table)}
+    if np is not None:
+        states = np.unpackbits(np.frombuffer(bits, dtype=np.uint8), count=width * height).astype(np.bool_).reshape((height, width))
+    else:
+        states: array = array("b", [(bits[i // 8] >> (7 - i % 8)) & 1 for i in range(width * height)])
+    return Board.from_planes((width, height), ids, states, boats)
@@ -1,184 +1,1312 @@
-#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-
-
-from __future__ import annotations
-from enum import Enum
-from typing import Optional
-
-
-class State(Enum):
-    """Defines whether a tile or a boat has been seen by the opponent or not (yet)"""
-    NOTSEEN = False
-    """The given item has not been seen"""
-    SEEN = True
-    """The given item has been seen"""
-
-
-class Tile:
-    """Represents a tile in the game's board"""
-    def __init__(self, boat_id: Optional[int], state: State) -> None:
-        """Inits a tile
-        
-        Parameters
-        ----------
-        
-        - boat_id: if this tile contains a boat corresponds to its id, else 0
-        
-        - state: determines whether this tile has been seen by the opponent or not (yet)"""
-        self.__boat_id: Optional[int] = boat_id
-        self.__state: State = state
-
-    def __repr__(self) -> str:
-        if self.__boat_id is None:
-            id: str = "XXX"
-        elif len(str(self.__boat_id)) == 1:
-            id: str = "00" + str(self.__boat_id)
-        elif len(str(self.__boat_id)) == 2:
-            id: str = "0" + str(self.__boat_id)
-        else:
-            id: str = str(self.__boat_id)[0:3]
-        if self.__state == State.SEEN:
-            state: str = "S"
-        else:
-            state: str = "N"
-        return id + state
-
-    def get_boat_id(self) -> Optional[int]:
-        """Returns this tile's boat id"""
-        return self.__boat_id
-    
-    def get_state(self) -> State:
-        """Returns this tile's state"""
-        return self.__state
-    
-    def view(self) -> None:
-        """Sets this tile's state to seen (`SeenState.SEEN`)"""
-        self.__state = State.SEEN
-
-    def copy(self) -> Tile:
-        """Returns a copy of this tile"""
-        return Tile(self.__boat_id, self.__state)
-
-
-class Board:
-    """Represents the game's board which is a sea"""
-    def __init__(self, size: tuple[int, int]) -> None:
-        """Inits a board
-        
-        Parameters
-        ----------
-        
-        - size: a couple of numeric value which correspond to its width and height (in order)"""
-        self.__grid: list[list[Tile]] = [[Tile(None, State.NOTSEEN) for i in range(size[0])] for j in range(size[1])]
-        self.__boats: dict[int, State] = {}
-
-    def __repr__(self) -> str:
-        return "\n".join(["".join([str(tile) for tile in line]) for line in self.__grid])
-
-    def size(self) -> tuple[int, int]:
-        """Returns this board's size, i.e. its width and its height"""
-        return (len(self.__grid[0]), len(self.__grid))
-
-    def get_grid(self) -> list[list[Tile]]:
-        """Returns a copy of this board's grid"""
-        return [[t.copy() for t in line.copy()] for line in self.__grid.copy()]
-
-    def get_boats(self) -> dict[int, State]:
-        """Returns a copy of this board's boats which is a dictionary that contains for each index, the state of the boat that have this index as id
-        
-        Example
-        -------
-        
-        For instance:
-        ```
-        >>> sea.get_boats()
-        {0: SeenState.SEEN, 1: SeenState.NOTSEEN}
-        ```
-        means that this board contains 2 boats. The first one has been seen by the opponent and the second one has not"""
-        return self.__boats.copy()
-
-    def get_tile_at(self, pos: tuple[int, int]) -> Tile:
-        """Returns a copy the tile at the given position (under the form `(x, y)`) on this board's grid"""
-        try:
-            return self.__grid[pos[1]][pos[0]].copy()
-        except IndexError:
-            raise IndexError(f"Max value: {self.size()}; given: {pos}")
-
-    def set_tile_at(self, new_tile: Tile, pos: tuple[int, int]) -> None:
-        """Sets this board's grid to the given tile at the given position (under the form `(x, y)`). Also update this board's boats (add a boat to it if the given tile contains a new boat)"""
-        self.__grid[pos[1]][pos[0]] = new_tile
-        if not new_tile.get_boat_id() is None:
-            if new_tile.get_boat_id() in self.__boats.keys() and new_tile.get_state() == State.NOTSEEN:
-                # the boat has not been fully seen anymore
-                self.__boats[new_tile.get_boat_id()] = State.NOTSEEN
-            elif not new_tile.get_boat_id() in self.__boats.keys():
-                # creates a new boat
-                self.__boats[new_tile.get_boat_id()] = new_tile.get_state()
-
-    def add_row(self) -> None:
-        """Adds an empty line at the bottom to this board's grid"""
-        self.__grid.append([Tile(None, State.NOTSEEN) for i in range(len(self.__grid[0]))])
-
-    def del_row(self) -> None:
-        """Deletes the last line of this board's grid. This removes boats if necessary"""
-        if len(self.__grid) > 1:
-            deleted_line: list[Tile] = self.__grid.pop()
-            for boat_id in {t.get_boat_id() for t in deleted_line if t is not None}:
-                was_deleted: bool = True
-                for line in self.__grid:
-                    for tile in line:
-                        if tile.get_boat_id() == boat_id:
-                            was_deleted: bool = False
-                if was_deleted:
-                    del self.__boats[boat_id]
-
-    def add_column(self) -> None:
-        """Adds an empty column on the right to this board's grid"""
-        for line in self.__grid:
-            line.append(Tile(None, State.NOTSEEN))
-
-    def del_column(self) -> None:
-        """Deletes the last row of this board's grid. This removes boats if necessary"""
-        if len(self.__grid[0]) > 1:
-            deleted_column: list[Tile] = []
-            for line in self.__grid:
-                deleted_column.append(line.pop())
-            for boat_id in {t.get_boat_id() for t in deleted_column if t is not None}:
-                was_deleted: bool = True
-                for line in self.__grid:
-                    for tile in line:
-                        if tile.get_boat_id() == boat_id:
-                            was_deleted: bool = False
-                if was_deleted:
-                    del self.__boats[boat_id]
-
-    def guess_tile(self, pos: tuple[int, int]) -> None:
-        """Guesses whether the tile at the given position on this board's grid is a boat. Does nothing if the tile has already been guessed"""
-        current_tile: Tile = self.__grid[pos[1]][pos[0]]
-        if current_tile.get_state == State.SEEN:
-            return
-        current_tile.view()
-        if current_tile.get_boat_id() is not None:
-            boat_is_seen: bool = True
-            for line in self.__grid:
-                for tile in line:
-                    if tile.get_boat_id() == current_tile.get_boat_id() and tile.get_state() == State.NOTSEEN:
-                        boat_is_seen = False
-            if boat_is_seen:
-                self.__boats[current_tile.get_boat_id()] = State.SEEN
-
-    def is_finished(self) -> bool:
-        """Returns whether all the boats have been found by the opponent or not"""
-        for state in self.__boats.values():
-            if state == State.NOTSEEN:
-                return False
-        return True
-
-    def del_boat(self, boat_id: int) -> None:
-        """Removes the boat of the given id"""
-        del self.__boats[boat_id]
-        for y in range(len(self.__grid)):
-            for x in range(len(self.__grid[0])):
-                if self.__grid[y][x].get_boat_id() == boat_id:
-                    self.__grid[y][x] = Tile(None, State.NOTSEEN)
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+from __future__ import annotations
+import importlib.util
+import sys
+
+from enum import Enum
+from types import MappingProxyType, ModuleType
+from typing import Callable, Iterable, Iterator, Mapping, Optional
+from array import array
+from bisect import bisect_right, insort
+from collections.abc import MutableMapping
+from math import inf
+
+
+def optional_import(name: str) -> Optional[ModuleType]:
+    """Returns the module of the given name, or `None` if it is not installed. The module is only executed when one of its attributes is first used, so that programs not using it start faster (e.g. numpy, see `terminal.py`)"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        return None
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module: ModuleType = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+np = optional_import("numpy")
+
+
+class State(Enum):
+    """Defines whether a tile or a boat has been seen by the opponent or not (yet)"""
+    NOTSEEN = False
+    """The given item has not been seen"""
+    SEEN = True
+    """The given item has been seen"""
+
+
+class Tile:
+    """Represents a tile in the game's board"""
+    __slots__ = ("__boat_id", "__state")
+
+    def __init__(self, boat_id: Optional[int], state: State) -> None:
+        """Inits a tile
+        
+        Parameters
+        ----------
+        
+        - boat_id: if this tile contains a boat corresponds to its id, else 0
+        
+        - state: determines whether this tile has been seen by the opponent or not (yet)"""
+        self.__boat_id: Optional[int] = boat_id
+        self.__state: State = state
+
+    def __repr__(self) -> str:
+        return Tile.text(self.__boat_id, self.__state)
+
+    @staticmethod
+    def text(boat_id: Optional[int], state: State) -> str:
+        """Returns the representation of a tile with the given boat id and state, without creating it"""
+        if boat_id is None:
+            id: str = "XXX"
+        elif len(str(boat_id)) == 1:
+            id: str = "00" + str(boat_id)
+        elif len(str(boat_id)) == 2:
+            id: str = "0" + str(boat_id)
+        else:
+            id: str = str(boat_id)[0:3]
+        if state == State.SEEN:
+            state: str = "S"
+        else:
+            state: str = "N"
+        return id + state
+
+    def get_boat_id(self) -> Optional[int]:
+        """Returns this tile's boat id"""
+        return self.__boat_id
+    
+    def get_state(self) -> State:
+        """Returns this tile's state"""
+        return self.__state
+    
+    def view(self) -> None:
+        """Sets this tile's state to seen (`SeenState.SEEN`)"""
+        self.__state = State.SEEN
+
+    def copy(self) -> Tile:
+        """Returns a copy of this tile"""
+        return Tile(self.__boat_id, self.__state)
+
+
+class SharedTile(Tile):
+    """A tile shared by every place that holds it (a flyweight), which therefore cannot be changed"""
+    __slots__ = ()
+
+    def view(self) -> None:
+        raise TypeError("A shared tile cannot be changed; set a new tile instead")
+
+
+EMPTY_TILES: dict[State, SharedTile] = {state: SharedTile(None, state) for state in State}
+"""The shared empty tile of each state"""
+
+
+NO_BOAT: int = -1
+"""The value used in a packed id plane for tiles that do not contain any boat"""
+
+Segment = tuple[int, int, int, bool]
+"""A boat in one piece, as its first tile `(x, y)`, its length and whether it is horizontal (see `Board.place_boat`)"""
+
+
+class Salvo:
+    """The results of guessing several tiles at once (see `Board.guess_many`)"""
+    def __init__(self, shots: int, revealed: list[tuple[int, int]], hits: dict[int, int], sunk: list[int]) -> None:
+        self.shots: int = shots
+        """The number of different tiles guessed"""
+        self.revealed: list[tuple[int, int]] = revealed
+        """The positions of the guessed tiles that had not been seen yet, in order"""
+        self.hits: dict[int, int] = hits
+        """The number of tiles revealed of each boat hit"""
+        self.sunk: list[int] = sunk
+        """The ids of the boats fully seen because of these guesses"""
+
+    def __repr__(self) -> str:
+        return f"shots: {self.shots}, revealed: {len(self.revealed)}, hits: {sum(self.hits.values())} on {len(self.hits)} boat(s), sunk: {len(self.sunk)}"
+
+
+class TileGrid:
+    """Stores a board's tiles as a list of lines of `Tile` objects (one object per tile)"""
+    def __init__(self, size: tuple[int, int]) -> None:
+        """Inits a grid of empty tiles
+        
+        Parameters
+        ----------
+        
+        - size: a couple of numeric value which correspond to its width and height (in order)"""
+        self.__lines: list[list[Tile]] = [[EMPTY_TILES[State.NOTSEEN]] * size[0] for j in range(size[1])]
+        self.__shared: bool = False
+        """Whether the list of lines is shared with a snapshot"""
+        self.__private: Optional[set[int]] = None
+        """The lines that are not shared with a snapshot, all of them if `None`"""
+
+    def snapshot(self) -> TileGrid:
+        """Returns a copy of this grid in constant time. Both grids share their lines until they change them: a line is only copied by the first change made to it (copy-on-write)"""
+        grid: TileGrid = TileGrid.__new__(TileGrid)
+        grid.__lines = self.__lines
+        grid.__shared = self.__shared = True
+        grid.__private = set()
+        self.__private = set()
+        return grid
+
+    def __own_lines(self) -> None:
+        """Copies the list of lines (not the lines themselves) before it is changed if it is shared with a snapshot"""
+        if self.__shared:
+            self.__lines = list(self.__lines)
+            self.__shared = False
+
+    def __line(self, y: int) -> list[Tile]:
+        """Returns the given line to change it, copied first if it is shared with a snapshot"""
+        self.__own_lines()
+        if self.__private is not None:
+            y %= len(self.__lines)
+            if y not in self.__private:
+                self.__lines[y] = list(self.__lines[y])
+                self.__private.add(y)
+        return self.__lines[y]
+
+    def size(self) -> tuple[int, int]:
+        """Returns this grid's size, i.e. its width and its height"""
+        return (len(self.__lines[0]), len(self.__lines))
+
+    def boat_id_at(self, pos: tuple[int, int]) -> Optional[int]:
+        """Returns the boat id of the tile at the given position (under the form `(x, y)`)"""
+        return self.__lines[pos[1]][pos[0]].get_boat_id()
+
+    def state_at(self, pos: tuple[int, int]) -> State:
+        """Returns the state of the tile at the given position (under the form `(x, y)`)"""
+        return self.__lines[pos[1]][pos[0]].get_state()
+
+    def set(self, pos: tuple[int, int], boat_id: Optional[int], state: State) -> None:
+        """Sets the tile at the given position (under the form `(x, y)`). Empty tiles are shared (see `EMPTY_TILES`)"""
+        self.__line(pos[1])[pos[0]] = EMPTY_TILES[state] if boat_id is None else Tile(boat_id, state)
+
+    def set_segment(self, horizontal: bool, line: int, start: int, length: int, boat_id: int, state: State) -> None:
+        """Sets the tiles of a horizontal segment of the given line (or of a vertical one of the given column) from the given position on. The tiles must not contain any boat"""
+        if horizontal:
+            self.__line(line)[start:start + length] = [Tile(boat_id, state) for i in range(length)]
+        else:
+            for y in range(start, start + length):
+                self.__line(y)[line] = Tile(boat_id, state)
+
+    def view(self, pos: tuple[int, int]) -> None:
+        """Sets the state of the tile at the given position (under the form `(x, y)`) to seen"""
+        tile: Tile = self.__lines[pos[1]][pos[0]]
+        if tile.get_state() == State.NOTSEEN:
+            self.set(pos, tile.get_boat_id(), State.SEEN)
+
+    def row(self, y: int):
+        """Returns an iterator over the boat id and the state of each tile of the given line"""
+        return ((tile.get_boat_id(), tile.get_state()) for tile in self.__lines[y])
+
+    def add_row(self) -> None:
+        """Adds an empty line at the bottom of this grid"""
+        self.__own_lines()
+        self.__lines.append([EMPTY_TILES[State.NOTSEEN]] * len(self.__lines[0]))
+        if self.__private is not None:
+            self.__private.add(len(self.__lines) - 1)
+
+    def del_row(self) -> None:
+        """Deletes the last line of this grid"""
+        self.__own_lines()
+        self.__lines.pop()
+        if self.__private is not None:
+            self.__private.discard(len(self.__lines))
+
+    def add_column(self) -> None:
+        """Adds an empty column on the right of this grid"""
+        for y in range(len(self.__lines)):
+            self.__line(y).append(EMPTY_TILES[State.NOTSEEN])
+
+    def del_column(self) -> None:
+        """Deletes the last column of this grid"""
+        for y in range(len(self.__lines)):
+            self.__line(y).pop()
+
+    def last_row_boats(self) -> list[tuple[int, int]]:
+        """Returns the positions of the tiles of the last line of this grid that contain a boat"""
+        return [(x, len(self.__lines) - 1) for x, tile in enumerate(self.__lines[-1]) if tile.get_boat_id() is not None]
+
+    def last_column_boats(self) -> list[tuple[int, int]]:
+        """Returns the positions of the tiles of the last column of this grid that contain a boat"""
+        return [(len(self.__lines[0]) - 1, y) for y, line in enumerate(self.__lines) if line[-1].get_boat_id() is not None]
+
+    def id_plane(self) -> list[list[int]]:
+        """Returns the boat ids of this grid line by line, `NO_BOAT` standing for tiles without boat"""
+        return [[NO_BOAT if t.get_boat_id() is None else t.get_boat_id() for t in line] for line in self.__lines]
+
+    def state_plane(self) -> list[list[bool]]:
+        """Returns whether each tile of this grid has been seen, line by line"""
+        return [[t.get_state().value for t in line] for line in self.__lines]
+
+
+class PackedGrid:
+    """Stores a board's tiles as two packed planes: the boat ids and the seen states.
+    
+    The planes are 2D numpy arrays (of shape `(height, width)`) if numpy is installed, else flat `array.array` in line-major order. No `Tile` object is kept, which makes large boards much lighter and faster to build. Boat ids must be non-negative since `NO_BOAT` marks empty tiles.
+    
+    Once shared with a snapshot, the planes are never changed again: each line changed afterwards is copied aside and replaces the line of the planes, so that memory only grows with the lines changed (see `snapshot`)"""
+    def __init__(self, size: tuple[int, int]) -> None:
+        """Inits a grid of empty tiles
+        
+        Parameters
+        ----------
+        
+        - size: a couple of numeric value which correspond to its width and height (in order)"""
+        self.__width: int = size[0]
+        self.__height: int = size[1]
+        if np is not None:
+            self.__ids = np.full((self.__height, self.__width), NO_BOAT, dtype=np.int64)
+            self.__states = np.zeros((self.__height, self.__width), dtype=np.bool_)
+        else:
+            self.__ids = array("q", [NO_BOAT]) * (self.__width * self.__height)
+            self.__states = array("b", [0]) * (self.__width * self.__height)
+        self.__shared: bool = False
+        """Whether the planes are shared with a snapshot, in which case they are not changed anymore"""
+        self.__id_lines: dict = {}
+        """The boat ids of the lines changed since the planes have been shared, which replace the lines of the planes"""
+        self.__state_lines: dict = {}
+        """The states of the lines changed since the planes have been shared"""
+        self.__lines_shared: bool = False
+        """Whether the tables of changed lines are shared with a snapshot"""
+        self.__private: set[int] = set()
+        """The changed lines that are not shared with a snapshot"""
+
+    @classmethod
+    def from_planes(cls, size: tuple[int, int], ids, states) -> PackedGrid:
+        """Returns a grid using the given planes as they are (without copying them), e.g. memory-mapped arrays
+        
+        Parameters
+        ----------
+        
+        - size: a couple of numeric value which correspond to its width and height (in order)
+        
+        - ids: the boat ids, `NO_BOAT` standing for tiles without boat. A 2D numpy array of any signed integer type if numpy is installed, else a flat `array.array("q")`
+        
+        - states: whether each tile has been seen. A 2D numpy array of booleans if numpy is installed, else a flat `array.array("b")`"""
+        grid: PackedGrid = cls((0, 0))
+        grid.__width = size[0]
+        grid.__height = size[1]
+        grid.__ids = ids
+        grid.__states = states
+        return grid
+
+    def snapshot(self) -> PackedGrid:
+        """Returns a copy of this grid in constant time. Both grids share their planes and their changed lines: a line is only copied by the first change made to it (copy-on-write)"""
+        grid: PackedGrid = PackedGrid.from_planes(self.size(), self.__ids, self.__states)
+        grid.__id_lines = self.__id_lines
+        grid.__state_lines = self.__state_lines
+        grid.__shared = self.__shared = True
+        grid.__lines_shared = self.__lines_shared = True
+        self.__private = set()
+        return grid
+
+    def __check(self, pos: tuple[int, int]) -> tuple[int, int]:
+        """Returns the given position (under the form `(x, y)`) with negative values counted from the end, as a list of lists would do"""
+        x, y = pos
+        if not (-self.__width <= x < self.__width and -self.__height <= y < self.__height):
+            raise IndexError(f"Max value: {self.size()}; given: {pos}")
+        return (x % self.__width, y % self.__height)
+
+    def __get(self, plane, lines: dict, x: int, y: int):
+        """Returns the value of the given plane at the given (normalized) position, taking the changed lines into account"""
+        if lines and y in lines:
+            return lines[y][x]
+        return plane[(y, x) if np is not None else y * self.__width + x]
+
+    def __read(self, y: int) -> tuple:
+        """Returns the boat ids and the states holding the given (normalized) line, and the index of its first tile in them"""
+        if y in self.__id_lines:
+            return (self.__id_lines[y], self.__state_lines[y], 0)
+        if np is not None:
+            return (self.__ids[y], self.__states[y], 0)
+        return (self.__ids, self.__states, y * self.__width)
+
+    def __line(self, y: int) -> tuple:
+        """Returns the boat ids and the states holding the given (normalized) line to change it, and the index of its first tile in them. The line is copied first if the planes are shared with a snapshot"""
+        if not self.__shared:
+            return self.__read(y)
+        if self.__lines_shared:
+            self.__id_lines = dict(self.__id_lines)
+            self.__state_lines = dict(self.__state_lines)
+            self.__lines_shared = False
+        if y not in self.__private:
+            ids, states, start = self.__read(y)
+            self.__id_lines[y] = ids.copy() if np is not None else ids[start:start + self.__width]
+            self.__state_lines[y] = states.copy() if np is not None else states[start:start + self.__width]
+            self.__private.add(y)
+        return (self.__id_lines[y], self.__state_lines[y], 0)
+
+    def __merge(self, dtype=None) -> None:
+        """Replaces the planes with new ones holding the changed lines, if the planes are shared with a snapshot (which costs a copy of them), e.g. before the size of this grid changes. The boat ids are also converted to the given numpy type, if any"""
+        if not self.__shared:
+            if dtype is not None:
+                self.__ids = self.__ids.astype(dtype)
+            return
+        if np is not None:
+            ids = self.__ids.astype(dtype or self.__ids.dtype)
+            states = np.array(self.__states)
+            for y, line in self.__id_lines.items():
+                ids[y] = line
+                states[y] = self.__state_lines[y]
+        else:
+            ids: array = self.__ids[:]
+            states: array = self.__states[:]
+            for y, line in self.__id_lines.items():
+                ids[y * self.__width:(y + 1) * self.__width] = line
+                states[y * self.__width:(y + 1) * self.__width] = self.__state_lines[y]
+        self.__ids = ids
+        self.__states = states
+        self.__id_lines = {}
+        self.__state_lines = {}
+        self.__private = set()
+        self.__shared = self.__lines_shared = False
+
+    def __widen(self, boat_id: int) -> None:
+        """Makes the boat ids able to hold the given one, the planes given to `from_planes` possibly using a narrower type"""
+        if np is not None and boat_id > np.iinfo(self.__ids.dtype).max:
+            self.__merge(np.int64)
+
+    def size(self) -> tuple[int, int]:
+        """Returns this grid's size, i.e. its width and its height"""
+        return (self.__width, self.__height)
+
+    def boat_id_at(self, pos: tuple[int, int]) -> Optional[int]:
+        """Returns the boat id of the tile at the given position (under the form `(x, y)`)"""
+        x, y = self.__check(pos)
+        boat_id: int = int(self.__get(self.__ids, self.__id_lines, x, y))
+        return None if boat_id == NO_BOAT else boat_id
+
+    def state_at(self, pos: tuple[int, int]) -> State:
+        """Returns the state of the tile at the given position (under the form `(x, y)`)"""
+        x, y = self.__check(pos)
+        return State.SEEN if self.__get(self.__states, self.__state_lines, x, y) else State.NOTSEEN
+
+    def set(self, pos: tuple[int, int], boat_id: Optional[int], state: State) -> None:
+        """Sets the tile at the given position (under the form `(x, y)`)"""
+        if boat_id is not None and boat_id < 0:
+            raise ValueError(f"Packed grids only support non-negative boat ids; given: {boat_id}")
+        x, y = self.__check(pos)
+        if boat_id is not None:
+            self.__widen(boat_id)
+        if not self.__shared:
+            index: tuple[int, int] | int = (y, x) if np is not None else y * self.__width + x
+            self.__ids[index] = NO_BOAT if boat_id is None else boat_id
+            self.__states[index] = state.value
+            return
+        ids, states, start = self.__line(y)
+        ids[start + x] = NO_BOAT if boat_id is None else boat_id
+        states[start + x] = state.value
+
+    def set_segment(self, horizontal: bool, line: int, start: int, length: int, boat_id: int, state: State) -> None:
+        """Sets the tiles of a horizontal segment of the given line (or of a vertical one of the given column) from the given position on, all at once. The tiles must not contain any boat"""
+        if boat_id < 0:
+            raise ValueError(f"Packed grids only support non-negative boat ids; given: {boat_id}")
+        self.__widen(boat_id)
+        if horizontal or self.__shared:
+            # only the lines of the segment are copied if the planes are shared
+            for y in [line] if horizontal else range(start, start + length):
+                ids, states, first = self.__line(y)
+                index: slice | int = slice(first + start, first + start + length) if horizontal else first + line
+                if np is not None or not horizontal:
+                    ids[index] = boat_id
+                    states[index] = state.value
+                else:
+                    ids[index] = array("q", [boat_id]) * length
+                    states[index] = array("b", [state.value]) * length
+        elif np is not None:
+            self.__ids[start:start + length, line] = boat_id
+            self.__states[start:start + length, line] = state.value
+        else:
+            first: int = start * self.__width + line
+            index: slice = slice(first, first + length * self.__width, self.__width)
+            self.__ids[index] = array("q", [boat_id]) * length
+            self.__states[index] = array("b", [state.value]) * length
+
+    def view(self, pos: tuple[int, int]) -> None:
+        """Sets the state of the tile at the given position (under the form `(x, y)`) to seen"""
+        x, y = self.__check(pos)
+        if not self.__shared:
+            self.__states[(y, x) if np is not None else y * self.__width + x] = True
+            return
+        ids, states, start = self.__line(y)
+        states[start + x] = True
+
+    def row(self, y: int):
+        """Returns an iterator over the boat id and the state of each tile of the given line"""
+        ids, states, start = self.__read(self.__check((0, y))[1])
+        if np is not None:
+            ids, states = ids.tolist(), states.tolist()
+        else:
+            ids, states = ids[start:start + self.__width], states[start:start + self.__width]
+        return ((None if boat_id == NO_BOAT else boat_id, State.SEEN if seen else State.NOTSEEN) for boat_id, seen in zip(ids, states))
+
+    def add_row(self) -> None:
+        """Adds an empty line at the bottom of this grid"""
+        self.__merge()
+        if np is not None:
+            self.__ids = np.concatenate((self.__ids, np.full((1, self.__width), NO_BOAT, dtype=np.int64)))
+            self.__states = np.concatenate((self.__states, np.zeros((1, self.__width), dtype=np.bool_)))
+        else:
+            self.__ids.extend(array("q", [NO_BOAT]) * self.__width)
+            self.__states.extend(array("b", [0]) * self.__width)
+        self.__height += 1
+
+    def del_row(self) -> None:
+        """Deletes the last line of this grid"""
+        self.__merge()
+        if np is not None:
+            self.__ids = self.__ids[:-1]
+            self.__states = self.__states[:-1]
+        else:
+            del self.__ids[-self.__width:]
+            del self.__states[-self.__width:]
+        self.__height -= 1
+
+    def add_column(self) -> None:
+        """Adds an empty column on the right of this grid"""
+        self.__merge()
+        if np is not None:
+            self.__ids = np.concatenate((self.__ids, np.full((self.__height, 1), NO_BOAT, dtype=np.int64)), axis=1)
+            self.__states = np.concatenate((self.__states, np.zeros((self.__height, 1), dtype=np.bool_)), axis=1)
+        else:
+            ids: array = array("q")
+            states: array = array("b")
+            for y in range(self.__height):
+                ids.extend(self.__ids[y * self.__width:(y + 1) * self.__width])
+                ids.append(NO_BOAT)
+                states.extend(self.__states[y * self.__width:(y + 1) * self.__width])
+                states.append(0)
+            self.__ids = ids
+            self.__states = states
+        self.__width += 1
+
+    def del_column(self) -> None:
+        """Deletes the last column of this grid"""
+        self.__merge()
+        if np is not None:
+            self.__ids = self.__ids[:, :-1]
+            self.__states = self.__states[:, :-1]
+        else:
+            ids: array = array("q")
+            states: array = array("b")
+            for y in range(self.__height):
+                ids.extend(self.__ids[y * self.__width:(y + 1) * self.__width - 1])
+                states.extend(self.__states[y * self.__width:(y + 1) * self.__width - 1])
+            self.__ids = ids
+            self.__states = states
+        self.__width -= 1
+
+    def last_row_boats(self) -> list[tuple[int, int]]:
+        """Returns the positions of the tiles of the last line of this grid that contain a boat"""
+        y: int = self.__height - 1
+        ids, states, start = self.__read(y)
+        if np is not None:
+            return [(x, y) for x in np.flatnonzero(ids != NO_BOAT).tolist()]
+        return [(x, y) for x in range(self.__width) if ids[start + x] != NO_BOAT]
+
+    def last_column_boats(self) -> list[tuple[int, int]]:
+        """Returns the positions of the tiles of the last column of this grid that contain a boat"""
+        x: int = self.__width - 1
+        if np is not None:
+            column = self.__ids[:, x].copy()
+            for y, line in self.__id_lines.items():
+                column[y] = line[x]
+            return [(x, y) for y in np.flatnonzero(column != NO_BOAT).tolist()]
+        return [(x, y) for y in range(self.__height) if self.__get(self.__ids, self.__id_lines, x, y) != NO_BOAT]
+
+    def id_plane(self):
+        """Returns the boat ids of this grid, `NO_BOAT` standing for tiles without boat. This is a read-only view of the numpy array if numpy is installed, else a copy of the flat array. If lines changed since the planes have been shared with a snapshot, the planes are first copied once to hold them (see `snapshot`)"""
+        if self.__id_lines:
+            self.__merge()
+        if np is not None:
+            plane = self.__ids.view()
+            plane.flags.writeable = False
+            return plane
+        return array("q", self.__ids)
+
+    def state_plane(self):
+        """Returns whether each tile of this grid has been seen. This is a read-only view of the numpy array if numpy is installed, else a copy of the flat array. If lines changed since the planes have been shared with a snapshot, the planes are first copied once to hold them (see `snapshot`)"""
+        if self.__id_lines:
+            self.__merge()
+        if np is not None:
+            plane = self.__states.view()
+            plane.flags.writeable = False
+            return plane
+        return array("b", self.__states)
+
+
+class SegmentGrid:
+    """Stores a board's boats as segments, i.e. horizontal or vertical lines of tiles given by their origin, their length and their boat id, and the seen tiles as a sparse set.
+    
+    Its memory only depends on the number of boats and of guesses, not on its size: this suits huge and mostly empty seas. Adding or deleting a line or a column only costs as much as the segments and the seen tiles on it"""
+    def __init__(self, size: tuple[int, int]) -> None:
+        """Inits a grid of empty tiles
+        
+        Parameters
+        ----------
+        
+        - size: a couple of numeric value which correspond to its width and height (in order)"""
+        self.__width: int = size[0]
+        self.__height: int = size[1]
+        self.__rows: dict[int, list[tuple[int, int, int]]] = {}
+        """The horizontal segments (and the single tiles) of each line, as sorted `(x, length, boat_id)`"""
+        self.__columns: dict[int, list[tuple[int, int, int]]] = {}
+        """The vertical segments of each column, as sorted `(y, length, boat_id)`"""
+        self.__row_ends: dict[int, set[int]] = {}
+        """For each column, the lines having a horizontal segment that ends on it"""
+        self.__column_ends: dict[int, set[int]] = {}
+        """For each line, the columns having a vertical segment that ends on it"""
+        self.__seen_rows: dict[int, set[int]] = {}
+        """For each line, the seen tiles on it"""
+        self.__seen_columns: dict[int, set[int]] = {}
+        """For each column, the seen tiles on it"""
+        self.__shared: bool = False
+        """Whether the tables above are shared with a snapshot"""
+        self.__private: Optional[set[tuple[str, int]]] = None
+        """The entries of the tables above (by table name and key) that are not shared with a snapshot, all of them if `None`"""
+
+    def snapshot(self) -> SegmentGrid:
+        """Returns a copy of this grid in constant time. Both grids share their tables until they change them: the tables are copied by the first change (which costs as much as the number of lines and columns having boats or seen tiles) and their entries, i.e. the segments and the seen tiles of a line or of a column, by the first change made to each of them (copy-on-write)"""
+        grid: SegmentGrid = SegmentGrid.__new__(SegmentGrid)
+        grid.__width = self.__width
+        grid.__height = self.__height
+        grid.__rows = self.__rows
+        grid.__columns = self.__columns
+        grid.__row_ends = self.__row_ends
+        grid.__column_ends = self.__column_ends
+        grid.__seen_rows = self.__seen_rows
+        grid.__seen_columns = self.__seen_columns
+        grid.__shared = self.__shared = True
+        grid.__private = set()
+        self.__private = set()
+        return grid
+
+    def __own(self) -> None:
+        """Copies the tables (not their entries) before they are changed if they are shared with a snapshot"""
+        if self.__shared:
+            self.__rows = dict(self.__rows)
+            self.__columns = dict(self.__columns)
+            self.__row_ends = dict(self.__row_ends)
+            self.__column_ends = dict(self.__column_ends)
+            self.__seen_rows = dict(self.__seen_rows)
+            self.__seen_columns = dict(self.__seen_columns)
+            self.__shared = False
+
+    def __entry(self, name: str, table: dict, key: int, default: type) -> list | set:
+        """Returns the entry of the given table (of the given name) for the given key to change it, created if missing and copied first if it is shared with a snapshot. The tables must have been copied first (see `__own`)"""
+        entry: Optional[list | set] = table.get(key)
+        if self.__private is None:
+            return entry if entry is not None else table.setdefault(key, default())
+        if entry is None or (name, key) not in self.__private:
+            entry = table[key] = default() if entry is None else default(entry)
+            self.__private.add((name, key))
+        return entry
+
+    def __check(self, pos: tuple[int, int]) -> tuple[int, int]:
+        """Returns the given position (under the form `(x, y)`) with negative values counted from the end, as a list of lists would do"""
+        if not (-self.__width <= pos[0] < self.__width and -self.__height <= pos[1] < self.__height):
+            raise IndexError(f"Max value: {self.size()}; given: {pos}")
+        return (pos[0] % self.__width, pos[1] % self.__height)
+
+    def __find(self, horizontal: bool, line: int, position: int) -> Optional[tuple[int, int, int]]:
+        """Returns the horizontal segment of the given line (or the vertical one of the given column) that covers the given position on it, if any"""
+        segments: Optional[list[tuple[int, int, int]]] = (self.__rows if horizontal else self.__columns).get(line)
+        if segments:
+            i: int = bisect_right(segments, (position, inf)) - 1
+            if i >= 0 and segments[i][0] + segments[i][1] > position:
+                return segments[i]
+        return None
+
+    def __add_segment(self, horizontal: bool, line: int, segment: tuple[int, int, int]) -> None:
+        """Adds a horizontal segment to the given line (or a vertical one to the given column)"""
+        insort(self.__entry("rows", self.__rows, line, list) if horizontal else self.__entry("columns", self.__columns, line, list), segment)
+        end: int = segment[0] + segment[1] - 1
+        (self.__entry("row_ends", self.__row_ends, end, set) if horizontal else self.__entry("column_ends", self.__column_ends, end, set)).add(line)
+
+    def __remove_segment(self, horizontal: bool, line: int, segment: tuple[int, int, int]) -> None:
+        """Removes a horizontal segment from the given line (or a vertical one from the given column)"""
+        lines: dict[int, list[tuple[int, int, int]]] = self.__rows if horizontal else self.__columns
+        segments: list[tuple[int, int, int]] = self.__entry("rows" if horizontal else "columns", lines, line, list)
+        segments.remove(segment)
+        if not segments:
+            del lines[line]
+        ends: dict[int, set[int]] = self.__row_ends if horizontal else self.__column_ends
+        end: int = segment[0] + segment[1] - 1
+        lines_ending: set[int] = self.__entry("row_ends" if horizontal else "column_ends", ends, end, set)
+        lines_ending.discard(line)
+        if not lines_ending:
+            del ends[end]
+
+    def size(self) -> tuple[int, int]:
+        """Returns this grid's size, i.e. its width and its height"""
+        return (self.__width, self.__height)
+
+    def boat_id_at(self, pos: tuple[int, int]) -> Optional[int]:
+        """Returns the boat id of the tile at the given position (under the form `(x, y)`)"""
+        x, y = self.__check(pos)
+        segment: Optional[tuple[int, int, int]] = self.__find(True, y, x) or self.__find(False, x, y)
+        return None if segment is None else segment[2]
+
+    def state_at(self, pos: tuple[int, int]) -> State:
+        """Returns the state of the tile at the given position (under the form `(x, y)`)"""
+        x, y = self.__check(pos)
+        return State.SEEN if x in self.__seen_rows.get(y, ()) else State.NOTSEEN
+
+    def set(self, pos: tuple[int, int], boat_id: Optional[int], state: State) -> None:
+        """Sets the tile at the given position (under the form `(x, y)`). A new boat tile is merged with the segment of the same boat it extends, if any"""
+        x, y = self.__check(pos)
+        self.__own()
+        # splits the segment covering the tile
+        for horizontal, line, position in ((True, y, x), (False, x, y)):
+            segment: Optional[tuple[int, int, int]] = self.__find(horizontal, line, position)
+            if segment is not None:
+                self.__remove_segment(horizontal, line, segment)
+                if position > segment[0]:
+                    self.__add_segment(horizontal, line, (segment[0], position - segment[0], segment[2]))
+                if segment[0] + segment[1] - 1 > position:
+                    self.__add_segment(horizontal, line, (position + 1, segment[0] + segment[1] - 1 - position, segment[2]))
+                break
+        if boat_id is not None:
+            left: Optional[tuple[int, int, int]] = self.__find(True, y, x - 1)
+            right: Optional[tuple[int, int, int]] = self.__find(True, y, x + 1)
+            left = left if left is not None and left[2] == boat_id else None
+            right = right if right is not None and right[2] == boat_id and right[0] == x + 1 else None
+            up: Optional[tuple[int, int, int]] = self.__find(False, x, y - 1)
+            down: Optional[tuple[int, int, int]] = self.__find(False, x, y + 1)
+            up = up if up is not None and up[2] == boat_id else None
+            down = down if down is not None and down[2] == boat_id and down[0] == y + 1 else None
+            if (left or right) is None and (up or down) is None:
+                # a single tile next to this one can become a vertical segment with it
+                for neighbour in (y - 1, y + 1):
+                    single: Optional[tuple[int, int, int]] = self.__find(True, neighbour, x)
+                    if single is not None and single[1] == 1 and single[2] == boat_id:
+                        self.__remove_segment(True, neighbour, single)
+                        if neighbour < y:
+                            up = (neighbour, 1, boat_id)
+                        else:
+                            down = (neighbour, 1, boat_id)
+                        break
+            if (up or down) is not None:
+                start, end = y, y
+                for segment in (up, down):
+                    if segment is not None:
+                        if segment in self.__columns.get(x, ()):
+                            self.__remove_segment(False, x, segment)
+                        start, end = min(start, segment[0]), max(end, segment[0] + segment[1] - 1)
+                self.__add_segment(False, x, (start, end - start + 1, boat_id))
+            else:
+                start, end = x, x
+                for segment in (left, right):
+                    if segment is not None:
+                        self.__remove_segment(True, y, segment)
+                        start, end = min(start, segment[0]), max(end, segment[0] + segment[1] - 1)
+                self.__add_segment(True, y, (start, end - start + 1, boat_id))
+        if state == State.SEEN:
+            self.view((x, y))
+        else:
+            self.__unview(x, y)
+
+    def set_segment(self, horizontal: bool, line: int, start: int, length: int, boat_id: int, state: State) -> None:
+        """Sets the tiles of a horizontal segment of the given line (or of a vertical one of the given column) from the given position on, as a single segment. The tiles must not contain any boat"""
+        if length == 1 and not horizontal:
+            # single tiles are horizontal segments
+            horizontal, line, start = True, start, line
+        self.__own()
+        self.__add_segment(horizontal, line, (start, length, boat_id))
+        for position in range(start, start + length):
+            x, y = (position, line) if horizontal else (line, position)
+            if state == State.SEEN:
+                self.view((x, y))
+            else:
+                self.__unview(x, y)
+
+    def view(self, pos: tuple[int, int]) -> None:
+        """Sets the state of the tile at the given position (under the form `(x, y)`) to seen"""
+        x, y = self.__check(pos)
+        self.__own()
+        self.__entry("seen_rows", self.__seen_rows, y, set).add(x)
+        self.__entry("seen_columns", self.__seen_columns, x, set).add(y)
+
+    def __unview(self, x: int, y: int) -> None:
+        """Sets the state of the tile at the given (normalized) position to not seen"""
+        if x in self.__seen_rows.get(y, ()):
+            self.__entry("seen_rows", self.__seen_rows, y, set).discard(x)
+            self.__entry("seen_columns", self.__seen_columns, x, set).discard(y)
+
+    def row(self, y: int):
+        """Returns an iterator over the boat id and the state of each tile of the given line"""
+        y = self.__check((0, y))[1]
+        seen: set[int] = self.__seen_rows.get(y, set())
+        # fills the line from its segments and from the vertical segments crossing it
+        ids: list[Optional[int]] = [None] * self.__width
+        for x, length, boat_id in self.__rows.get(y, ()):
+            ids[x:x + length] = [boat_id] * length
+        for x in self.__columns:
+            segment: Optional[tuple[int, int, int]] = self.__find(False, x, y)
+            if segment is not None:
+                ids[x] = segment[2]
+        return ((boat_id, State.SEEN if x in seen else State.NOTSEEN) for x, boat_id in enumerate(ids))
+
+    def add_row(self) -> None:
+        """Adds an empty line at the bottom of this grid"""
+        self.__height += 1
+
+    def del_row(self) -> None:
+        """Deletes the last line of this grid"""
+        y: int = self.__height - 1
+        self.__own()
+        for segment in list(self.__rows.get(y, ())):
+            self.__remove_segment(True, y, segment)
+        for x in list(self.__column_ends.get(y, ())):
+            segment: tuple[int, int, int] = self.__columns[x][-1]
+            self.__remove_segment(False, x, segment)
+            if segment[1] > 1:
+                self.__add_segment(False, x, (segment[0], segment[1] - 1, segment[2]))
+        for x in self.__seen_rows.pop(y, ()):
+            self.__entry("seen_columns", self.__seen_columns, x, set).discard(y)
+        self.__height -= 1
+
+    def add_column(self) -> None:
+        """Adds an empty column on the right of this grid"""
+        self.__width += 1
+
+    def del_column(self) -> None:
+        """Deletes the last column of this grid"""
+        x: int = self.__width - 1
+        self.__own()
+        for segment in list(self.__columns.get(x, ())):
+            self.__remove_segment(False, x, segment)
+        for y in list(self.__row_ends.get(x, ())):
+            segment: tuple[int, int, int] = self.__rows[y][-1]
+            self.__remove_segment(True, y, segment)
+            if segment[1] > 1:
+                self.__add_segment(True, y, (segment[0], segment[1] - 1, segment[2]))
+        for y in self.__seen_columns.pop(x, ()):
+            self.__entry("seen_rows", self.__seen_rows, y, set).discard(x)
+        self.__width -= 1
+
+    def last_row_boats(self) -> list[tuple[int, int]]:
+        """Returns the positions of the tiles of the last line of this grid that contain a boat"""
+        y: int = self.__height - 1
+        return [(x, y) for start, length, boat_id in self.__rows.get(y, ()) for x in range(start, start + length)] + [(x, y) for x in self.__column_ends.get(y, ())]
+
+    def last_column_boats(self) -> list[tuple[int, int]]:
+        """Returns the positions of the tiles of the last column of this grid that contain a boat"""
+        x: int = self.__width - 1
+        return [(x, y) for start, length, boat_id in self.__columns.get(x, ()) for y in range(start, start + length)] + [(x, y) for y in self.__row_ends.get(x, ())]
+
+    def id_plane(self):
+        """Returns the boat ids of this grid, `NO_BOAT` standing for tiles without boat. Unlike the grid, this is a dense 2D numpy array of shape `(height, width)` if numpy is installed, else a list of lines"""
+        plane = np.full((self.__height, self.__width), NO_BOAT, dtype=np.int64) if np is not None else [[NO_BOAT] * self.__width for y in range(self.__height)]
+        for y, segments in self.__rows.items():
+            for start, length, boat_id in segments:
+                for x in range(start, start + length):
+                    plane[y][x] = boat_id
+        for x, segments in self.__columns.items():
+            for start, length, boat_id in segments:
+                for y in range(start, start + length):
+                    plane[y][x] = boat_id
+        return plane
+
+    def state_plane(self):
+        """Returns whether each tile of this grid has been seen. Unlike the grid, this is a dense 2D numpy array of shape `(height, width)` if numpy is installed, else a list of lines"""
+        plane = np.zeros((self.__height, self.__width), dtype=np.bool_) if np is not None else [[False] * self.__width for y in range(self.__height)]
+        for y, xs in self.__seen_rows.items():
+            for x in xs:
+                plane[y][x] = True
+        return plane
+
+
+class SharedTable(MutableMapping):
+    """A dictionary with integer keys, e.g. boat ids, split into buckets of consecutive keys. A copy costs as much as the number of buckets and both tables share their buckets until they change them: a bucket is only copied by the first change made to one of its entries (copy-on-write, see `snapshot`)"""
+    BUCKET_BITS: int = 8
+    """The keys of a bucket only differ by their last bits"""
+
+    def __init__(self, items: Iterable[tuple[int, object]] = ()) -> None:
+        """Inits a table with the given keys and values"""
+        buckets: dict[int, dict] = {}
+        bits: int = self.BUCKET_BITS
+        for key, value in items:
+            bucket: Optional[dict] = buckets.get(key >> bits)
+            if bucket is None:
+                bucket = buckets[key >> bits] = {}
+            bucket[key] = value
+        self.__buckets: dict[int, dict] = buckets
+        self.__length: int = sum(map(len, buckets.values()))
+        self.__shared: bool = False
+        """Whether the table of buckets is shared with a snapshot"""
+        self.__private: Optional[set[int]] = None
+        """The buckets that are not shared with a snapshot, all of them if `None`"""
+
+    def snapshot(self) -> SharedTable:
+        """Returns a copy of this table, which costs as much as the number of buckets when one of the tables changes first"""
+        table: SharedTable = SharedTable.__new__(SharedTable)
+        table.__buckets = self.__buckets
+        table.__length = self.__length
+        table.__shared = self.__shared = True
+        table.__private = set()
+        self.__private = set()
+        return table
+
+    def __bucket(self, key: int) -> dict:
+        """Returns the bucket of the given key to change it, created if missing and copied first if it is shared with a snapshot"""
+        if self.__shared:
+            self.__buckets = dict(self.__buckets)
+            self.__shared = False
+        index: int = key >> self.BUCKET_BITS
+        bucket: Optional[dict] = self.__buckets.get(index)
+        if self.__private is None:
+            return bucket if bucket is not None else self.__buckets.setdefault(index, {})
+        if bucket is None or index not in self.__private:
+            bucket = self.__buckets[index] = {} if bucket is None else dict(bucket)
+            self.__private.add(index)
+        return bucket
+
+    def __getitem__(self, key: int):
+        bucket: Optional[dict] = self.__buckets.get(key >> self.BUCKET_BITS)
+        if bucket is None:
+            raise KeyError(key)
+        return bucket[key]
+
+    def get(self, key: int, default=None):
+        bucket: Optional[dict] = self.__buckets.get(key >> self.BUCKET_BITS)
+        return default if bucket is None else bucket.get(key, default)
+
+    def __contains__(self, key: object) -> bool:
+        bucket: Optional[dict] = self.__buckets.get(key >> self.BUCKET_BITS) if isinstance(key, int) else None
+        return bucket is not None and key in bucket
+
+    def __setitem__(self, key: int, value) -> None:
+        bucket: dict = self.__bucket(key)
+        self.__length += key not in bucket
+        bucket[key] = value
+
+    def __delitem__(self, key: int) -> None:
+        if key not in self:
+            raise KeyError(key)
+        bucket: dict = self.__bucket(key)
+        del bucket[key]
+        self.__length -= 1
+        if not bucket:
+            del self.__buckets[key >> self.BUCKET_BITS]
+
+    def __iter__(self) -> Iterator[int]:
+        for bucket in self.__buckets.values():
+            yield from bucket
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class Board:
+    """Represents the game's board which is a sea"""
+    def __init__(self, size: tuple[int, int], packed: bool = False, sparse: bool = False) -> None:
+        """Inits a board
+        
+        Parameters
+        ----------
+        
+        - size: a couple of numeric value which correspond to its width and height (in order)
+        
+        - packed: whether the tiles are stored in packed planes (see `PackedGrid`) instead of one `Tile` object per tile (see `TileGrid`). Packed boards only accept non-negative boat ids
+        
+        - sparse: whether the boats are stored as segments and the seen tiles as a set (see `SegmentGrid`), for huge and mostly empty boards. Cannot be used with `packed`"""
+        if packed and sparse:
+            raise ValueError("A board cannot be both packed and sparse")
+        self.__grid: TileGrid | PackedGrid | SegmentGrid = PackedGrid(size) if packed else SegmentGrid(size) if sparse else TileGrid(size)
+        self.__boats: SharedTable = SharedTable()
+        """The state of each boat (see `get_boats`)"""
+        self.__boat_tiles: SharedTable = SharedTable()
+        """The tiles of each boat, so that a boat never has to be searched on the whole grid: a segment for the boats in one piece (e.g. placed by `place_boat`), so that the index costs as much as the number of boats, else the set of their positions"""
+        self.__unseen: SharedTable = SharedTable()
+        """The number of tiles not seen yet of each boat, so that a boat is known to be sunk as soon as it reaches 0"""
+        self.__recorder: Optional[Callable[..., None]] = None
+        """The function called after each change of this board (see `set_recorder`)"""
+        self.__private_tiles: Optional[set[int]] = None
+        """The boats whose set of tiles is not shared with a snapshot, all of them if `None`. Segments are never changed but replaced"""
+
+    def snapshot(self) -> Board:
+        """Returns a copy of this board in constant time, e.g. to undo changes or to try moves. Both boards share their content until they change it (copy-on-write): the grid copies only the lines (or the table entries of sparse boards, see `SegmentGrid.snapshot`) that change, and the boats tables copy only the buckets of the boats that change (see `SharedTable`), each set of tiles (see `__boat_tiles`) only when its boat changes. The copy does not record its changes (see `set_recorder`)"""
+        board: Board = Board.__new__(Board)
+        board.__grid = self.__grid.snapshot()
+        board.__boats = self.__boats.snapshot()
+        board.__boat_tiles = self.__boat_tiles.snapshot()
+        board.__unseen = self.__unseen.snapshot()
+        board.__recorder = None
+        board.__private_tiles = set()
+        self.__private_tiles = set()
+        return board
+
+    def __tiles(self, boat_id: int) -> set[tuple[int, int]]:
+        """Returns the set of the tiles of the given boat to change it, created if missing, made from its segment if it is one and copied first if it is shared with a snapshot"""
+        tiles: Optional[Segment | set[tuple[int, int]]] = self.__boat_tiles.get(boat_id)
+        if isinstance(tiles, tuple):
+            tiles = self.__boat_tiles[boat_id] = set(self.__positions(tiles))
+            if self.__private_tiles is not None:
+                self.__private_tiles.add(boat_id)
+            return tiles
+        if self.__private_tiles is None:
+            return tiles if tiles is not None else self.__boat_tiles.setdefault(boat_id, set())
+        if tiles is None or boat_id not in self.__private_tiles:
+            tiles = self.__boat_tiles[boat_id] = set() if tiles is None else set(tiles)
+            self.__private_tiles.add(boat_id)
+        return tiles
+
+    @staticmethod
+    def __positions(tiles: Segment | set[tuple[int, int]]) -> Iterable[tuple[int, int]]:
+        """Returns the positions (under the form `(x, y)`) of the given tiles of a boat (see `__boat_tiles`)"""
+        if not isinstance(tiles, tuple):
+            return tiles
+        x, y, length, horizontal = tiles
+        return [(x + i, y) for i in range(length)] if horizontal else [(x, y + i) for i in range(length)]
+
+    @classmethod
+    def from_planes(cls, size: tuple[int, int], ids, states, boats: dict[int, State]) -> Board:
+        """Returns a packed board using the given planes as they are (see `PackedGrid.from_planes`). Building the boats index scans the whole ids plane once, a memory-mapped plane being read from start to end: with numpy, the tiles are grouped by boat at once (with a temporary mask of one byte per tile) and only the boats are then indexed one by one. Without numpy, each tile is read in Python
+        
+        Parameters
+        ----------
+        
+        - size: a couple of numeric value which correspond to its width and height (in order)
+        
+        - ids: the boat ids of the tiles
+        
+        - states: whether each tile has been seen
+        
+        - boats: the state of each boat of the board (see `get_boats`)"""
+        board: Board = cls((1, 1), True)
+        board.__grid = PackedGrid.from_planes(size, ids, states)
+        board.__boats = SharedTable(boats.items())
+        width: int = size[0]
+        # the number of tiles, the bounds (left, right, top, bottom) and the number of unseen tiles of each boat
+        bounds: Iterable[tuple[int, int, int, int, int, int, int]]
+        if np is not None:
+            flat = np.asarray(ids).reshape(-1)
+            positions = np.flatnonzero(flat != NO_BOAT)
+            # the tiles of each boat next to each other, in order
+            order = np.argsort(flat[positions], kind="stable")
+            positions = positions[order]
+            boat_ids, starts, counts = np.unique(flat[positions], return_index=True, return_counts=True)
+            if positions.size:
+                xs, ys = positions % width, positions // width
+                seen = np.add.reduceat(np.asarray(states).reshape(-1)[positions].astype(np.intp), starts)
+                bounds = zip(boat_ids.tolist(), counts.tolist(), np.minimum.reduceat(xs, starts).tolist(), np.maximum.reduceat(xs, starts).tolist(), np.minimum.reduceat(ys, starts).tolist(), np.maximum.reduceat(ys, starts).tolist(), (counts - seen).tolist())
+            else:
+                bounds = ()
+        else:
+            found: dict[int, list[int]] = {}
+            for i, boat_id in enumerate(ids):
+                if boat_id != NO_BOAT:
+                    x, y = i % width, i // width
+                    boat: Optional[list[int]] = found.get(boat_id)
+                    if boat is None:
+                        found[boat_id] = [1, x, x, y, y, 0 if states[i] else 1]
+                    else:
+                        boat[0] += 1
+                        boat[1], boat[2], boat[3], boat[4] = min(boat[1], x), max(boat[2], x), min(boat[3], y), max(boat[4], y)
+                        boat[5] += 0 if states[i] else 1
+            bounds = ((boat_id, *boat) for boat_id, boat in found.items())
+        boat_tiles: dict[int, Segment | set[tuple[int, int]]] = {}
+        unseen_tiles: dict[int, int] = {}
+        # the boats not in one piece, whose tiles are searched afterwards
+        scattered: dict[int, set[tuple[int, int]]] = {}
+        for boat_id, count, left, right, top, bottom, unseen in bounds:
+            # a boat is in one piece if its tiles fill a line between its bounds
+            if top == bottom and right - left + 1 == count:
+                boat_tiles[boat_id] = (left, top, count, True)
+            elif left == right and bottom - top + 1 == count:
+                boat_tiles[boat_id] = (left, top, count, False)
+            else:
+                scattered[boat_id] = boat_tiles[boat_id] = set()
+            unseen_tiles[boat_id] = unseen
+        board.__boat_tiles = SharedTable(boat_tiles.items())
+        board.__unseen = SharedTable(unseen_tiles.items())
+        if scattered:
+            if np is not None:
+                for boat_id, start, count in zip(boat_ids.tolist(), starts.tolist(), counts.tolist()):
+                    if boat_id in scattered:
+                        scattered[boat_id].update((position % width, position // width) for position in positions[start:start + count].tolist())
+            else:
+                for i, boat_id in enumerate(ids):
+                    if boat_id in scattered:
+                        scattered[boat_id].add((i % width, i // width))
+        return board
+
+    def set_recorder(self, recorder: Optional[Callable[..., None]]) -> None:
+        """Calls the given function after each change of this board with the name of the method and its arguments, positions being normalized (e.g. `recorder("guess_tile", (x, y))`, `recorder("set_tile_at", (x, y), boat_id, state)`, see `replay.Recorder`). `place_boat` also records the removal of the boats it overlaps (before the placement, with the id of the new boat) and `guess_many` the guess of each tile it reveals. Stops recording if `None`"""
+        self.__recorder = recorder
+
+    def __repr__(self) -> str:
+        return "\n".join(["".join([Tile.text(boat_id, state) for boat_id, state in self.iter_row(y)]) for y in range(self.size()[1])])
+
+    def size(self) -> tuple[int, int]:
+        """Returns this board's size, i.e. its width and its height"""
+        return self.__grid.size()
+
+    def is_packed(self) -> bool:
+        """Returns whether this board stores its tiles in packed planes"""
+        return isinstance(self.__grid, PackedGrid)
+
+    def is_sparse(self) -> bool:
+        """Returns whether this board stores its boats as segments"""
+        return isinstance(self.__grid, SegmentGrid)
+
+    def get_grid(self) -> list[list[Tile]]:
+        """Returns a copy of this board's grid"""
+        return [[Tile(boat_id, state) for boat_id, state in self.iter_row(y)] for y in range(self.size()[1])]
+
+    def get_id_plane(self):
+        """Returns the boat ids of all the tiles of this board at once, `NO_BOAT` standing for tiles without boat.
+        
+        For packed boards, this is a read-only 2D numpy array of shape `(height, width)` (or a flat line-major `array.array` copy if numpy is not installed), which costs a copy of the planes the first time after lines changed since a snapshot (see `PackedGrid.id_plane`). For other boards, this is a list of lines"""
+        return self.__grid.id_plane()
+
+    def get_state_plane(self):
+        """Returns whether each tile of this board has been seen, all at once.
+        
+        For packed boards, this is a read-only 2D numpy array of shape `(height, width)` (or a flat line-major `array.array` copy if numpy is not installed), which costs a copy of the planes the first time after lines changed since a snapshot (see `PackedGrid.state_plane`). For other boards, this is a list of lines"""
+        return self.__grid.state_plane()
+
+    def get_boats(self) -> dict[int, State]:
+        """Returns a copy of this board's boats which is a dictionary that contains for each index, the state of the boat that have this index as id
+        
+        Example
+        -------
+        
+        For instance:
+        ```
+        >>> sea.get_boats()
+        {0: SeenState.SEEN, 1: SeenState.NOTSEEN}
+        ```
+        means that this board contains 2 boats. The first one has been seen by the opponent and the second one has not"""
+        return dict(self.__boats)
+
+    def get_boat_tiles(self, boat_id: int) -> set[tuple[int, int]]:
+        """Returns a copy of the positions (under the form `(x, y)`) of the tiles of the boat of the given id"""
+        return set(self.__positions(self.__boat_tiles.get(boat_id, set())))
+
+    def boats_view(self) -> Mapping[int, State]:
+        """Returns a read-only view of this board's boats (see `get_boats`) which follows its changes, without copying them"""
+        return MappingProxyType(self.__boats)
+
+    def boat_id_at(self, pos: tuple[int, int]) -> Optional[int]:
+        """Returns the boat id of the tile at the given position (under the form `(x, y)`), without creating any tile"""
+        try:
+            return self.__grid.boat_id_at(pos)
+        except IndexError:
+            raise IndexError(f"Max value: {self.size()}; given: {pos}")
+
+    def state_at(self, pos: tuple[int, int]) -> State:
+        """Returns the state of the tile at the given position (under the form `(x, y)`), without creating any tile"""
+        try:
+            return self.__grid.state_at(pos)
+        except IndexError:
+            raise IndexError(f"Max value: {self.size()}; given: {pos}")
+
+    def iter_row(self, y: int) -> Iterator[tuple[Optional[int], State]]:
+        """Returns an iterator over the boat id and the state of each tile of the given line, from left to right, without creating any tile"""
+        return self.__grid.row(y)
+
+    def iter_cells(self) -> Iterator[tuple[tuple[int, int], Optional[int], State]]:
+        """Returns an iterator over the position (under the form `(x, y)`), the boat id and the state of each tile, line by line, without creating any tile"""
+        for y in range(self.size()[1]):
+            for x, (boat_id, state) in enumerate(self.__grid.row(y)):
+                yield ((x, y), boat_id, state)
+
+    def get_tile_at(self, pos: tuple[int, int]) -> Tile:
+        """Returns a copy the tile at the given position (under the form `(x, y)`) on this board's grid"""
+        try:
+            return Tile(self.__grid.boat_id_at(pos), self.__grid.state_at(pos))
+        except IndexError:
+            raise IndexError(f"Max value: {self.size()}; given: {pos}")
+
+    def set_tile_at(self, new_tile: Tile, pos: tuple[int, int]) -> None:
+        """Sets this board's grid to the given tile at the given position (under the form `(x, y)`). Also update this board's boats (add a boat to it if the given tile contains a new boat)"""
+        pos = self.__position(pos)
+        self.__forget_tile(pos)
+        self.__grid.set(pos, new_tile.get_boat_id(), new_tile.get_state())
+        if not new_tile.get_boat_id() is None:
+            self.__tiles(new_tile.get_boat_id()).add(pos)
+            if new_tile.get_state() == State.NOTSEEN:
+                self.__unseen[new_tile.get_boat_id()] = self.__unseen.get(new_tile.get_boat_id(), 0) + 1
+            if new_tile.get_boat_id() in self.__boats.keys() and new_tile.get_state() == State.NOTSEEN:
+                # the boat has not been fully seen anymore
+                self.__boats[new_tile.get_boat_id()] = State.NOTSEEN
+            elif not new_tile.get_boat_id() in self.__boats.keys():
+                # creates a new boat
+                self.__boats[new_tile.get_boat_id()] = new_tile.get_state()
+        if self.__recorder is not None:
+            self.__recorder("set_tile_at", pos, new_tile.get_boat_id(), new_tile.get_state())
+
+    def place_boat(self, start: tuple[int, int], end: tuple[int, int], boat_id: Optional[int] = None) -> int:
+        """Places a new boat, not seen yet, from the given start tile towards the given end tile (both under the form `(x, y)`), horizontally or vertically whichever is the longest (horizontally if equal). The boats it overlaps are removed. Returns the id of the new boat, which is the given one if any (e.g. to replay a placement, another boat with this id being removed), else the highest id plus one before the overlapped boats are removed"""
+        start = self.__position(start)
+        end = self.__position(end)
+        horizontal: bool = abs(end[0] - start[0]) >= abs(end[1] - start[1])
+        line: int = start[1] if horizontal else start[0]
+        first, last = sorted((start[0], end[0]) if horizontal else (start[1], end[1]))
+        segment: Segment = (first, line, last - first + 1, True) if horizontal else (line, first, last - first + 1, False)
+        if boat_id is None:
+            boat_id = max(self.__boats, default=-1) + 1
+        for overlapped in {self.__grid.boat_id_at(pos) for pos in self.__positions(segment)} - {None}:
+            self.del_boat(overlapped)
+        if boat_id in self.__boats:
+            # a boat is only made of one segment
+            self.del_boat(boat_id)
+        self.__grid.set_segment(horizontal, line, first, last - first + 1, boat_id, State.NOTSEEN)
+        self.__boat_tiles[boat_id] = segment
+        self.__unseen[boat_id] = segment[2]
+        self.__boats[boat_id] = State.NOTSEEN
+        if self.__recorder is not None:
+            self.__recorder("place_boat", start, end, boat_id)
+        return boat_id
+
+    def __position(self, pos: tuple[int, int]) -> tuple[int, int]:
+        """Returns the given position (under the form `(x, y)`) with negative values counted from the end, as a list of lists would do"""
+        width, height = self.size()
+        if not (-width <= pos[0] < width and -height <= pos[1] < height):
+            raise IndexError(f"Max value: {self.size()}; given: {pos}")
+        return (pos[0] % width, pos[1] % height)
+
+    def __forget_tile(self, pos: tuple[int, int]) -> Optional[int]:
+        """Removes the tile at the given (normalized) position from the boats index and returns its boat id. The boat itself is kept in this board's boats"""
+        boat_id: Optional[int] = self.__grid.boat_id_at(pos)
+        if boat_id is not None:
+            segment: Optional[Segment | set[tuple[int, int]]] = self.__boat_tiles.get(boat_id)
+            if isinstance(segment, tuple) and pos in (segment[:2], self.__positions(segment)[-1]):
+                # an end of a segment, which stays a segment (e.g. when a line is deleted)
+                x, y, length, horizontal = segment
+                if length == 1:
+                    del self.__boat_tiles[boat_id]
+                elif pos == (x, y):
+                    self.__boat_tiles[boat_id] = (x + 1, y, length - 1, True) if horizontal else (x, y + 1, length - 1, False)
+                else:
+                    self.__boat_tiles[boat_id] = (x, y, length - 1, horizontal)
+            else:
+                tiles: set[tuple[int, int]] = self.__tiles(boat_id)
+                tiles.discard(pos)
+                if not tiles:
+                    del self.__boat_tiles[boat_id]
+            if self.__grid.state_at(pos) == State.NOTSEEN:
+                self.__unseen[boat_id] -= 1
+        return boat_id
+
+    def __forget_boats(self, boat_ids: set[Optional[int]]) -> None:
+        """Removes from this board's boats the given boats that do not have any tile left"""
+        for boat_id in boat_ids - {None}:
+            if boat_id not in self.__boat_tiles:
+                del self.__boats[boat_id]
+                self.__unseen.pop(boat_id, None)
+
+    def add_row(self) -> None:
+        """Adds an empty line at the bottom to this board's grid"""
+        self.__grid.add_row()
+        if self.__recorder is not None:
+            self.__recorder("add_row")
+
+    def del_row(self) -> None:
+        """Deletes the last line of this board's grid. This removes boats if necessary"""
+        width, height = self.size()
+        if height > 1:
+            deleted_ids: set[Optional[int]] = {self.__forget_tile(pos) for pos in self.__grid.last_row_boats()}
+            self.__grid.del_row()
+            self.__forget_boats(deleted_ids)
+        if self.__recorder is not None:
+            self.__recorder("del_row")
+
+    def add_column(self) -> None:
+        """Adds an empty column on the right to this board's grid"""
+        self.__grid.add_column()
+        if self.__recorder is not None:
+            self.__recorder("add_column")
+
+    def del_column(self) -> None:
+        """Deletes the last row of this board's grid. This removes boats if necessary"""
+        width, height = self.size()
+        if width > 1:
+            deleted_ids: set[Optional[int]] = {self.__forget_tile(pos) for pos in self.__grid.last_column_boats()}
+            self.__grid.del_column()
+            self.__forget_boats(deleted_ids)
+        if self.__recorder is not None:
+            self.__recorder("del_column")
+
+    def guess_tile(self, pos: tuple[int, int]) -> None:
+        """Guesses whether the tile at the given position on this board's grid is a boat. Does nothing if the tile has already been guessed"""
+        pos = self.__position(pos)
+        boat_id: Optional[int] = self.__grid.boat_id_at(pos)
+        if self.__grid.state_at(pos) == State.NOTSEEN:
+            self.__grid.view(pos)
+            if boat_id is not None:
+                self.__unseen[boat_id] -= 1
+        if boat_id is not None and self.__unseen.get(boat_id, 0) == 0:
+            self.__boats[boat_id] = State.SEEN
+        if self.__recorder is not None:
+            self.__recorder("guess_tile", pos)
+
+    def guess_many(self, positions: Iterable[tuple[int, int]]) -> Salvo:
+        """Guesses all the tiles at the given positions (under the form `(x, y)`) at once, e.g. a salvo, and returns what they revealed. Each boat hit is updated once, so that this costs as much as the number of tiles guessed whatever the size of the board. Nothing is guessed if one of the positions is out of this board"""
+        targets: dict[tuple[int, int], None] = dict.fromkeys(self.__position(pos) for pos in positions)
+        return self.__salvo(targets)
+
+    def guess_area(self, rect: tuple[int, int, int, int]) -> Salvo:
+        """Guesses all the tiles of the given area at once, e.g. a bomb, and returns what they revealed (see `guess_many`). The area is given under the form `(x, y, width, height)` like a `pygame.Rect` and only its part inside this board is guessed"""
+        width, height = self.size()
+        left, top = max(rect[0], 0), max(rect[1], 0)
+        right, bottom = min(rect[0] + rect[2], width), min(rect[1] + rect[3], height)
+        return self.__salvo([(x, y) for y in range(top, bottom) for x in range(left, right)])
+
+    def __salvo(self, targets: Iterable[tuple[int, int]]) -> Salvo:
+        """Guesses the tiles at the given different (normalized) positions. Each revealed tile is recorded as a guess of it (see `set_recorder`). As with `guess_tile`, a boat of an already seen tile is sunk if all its tiles are seen, which is recorded as a guess of this tile"""
+        shots: int = 0
+        revealed: list[tuple[int, int]] = []
+        hits: dict[int, int] = {}
+        # a targeted tile already seen of each boat
+        seen: dict[int, tuple[int, int]] = {}
+        for pos in targets:
+            shots += 1
+            boat_id: Optional[int] = self.__grid.boat_id_at(pos)
+            if self.__grid.state_at(pos) == State.NOTSEEN:
+                self.__grid.view(pos)
+                revealed.append(pos)
+                if boat_id is not None:
+                    hits[boat_id] = hits.get(boat_id, 0) + 1
+            elif boat_id is not None:
+                seen.setdefault(boat_id, pos)
+        for boat_id, count in hits.items():
+            self.__unseen[boat_id] -= count
+        sunk: list[int] = []
+        # the boats of the seen tiles are checked too, since their state may lag behind their tiles (e.g. after `set_tile_at`)
+        for boat_id in dict.fromkeys([*hits, *seen]):
+            if self.__unseen.get(boat_id, 0) == 0 and self.__boats[boat_id] == State.NOTSEEN:
+                self.__boats[boat_id] = State.SEEN
+                sunk.append(boat_id)
+        if self.__recorder is not None:
+            for pos in revealed:
+                self.__recorder("guess_tile", pos)
+            for boat_id in sunk:
+                if boat_id not in hits:
+                    self.__recorder("guess_tile", seen[boat_id])
+        return Salvo(shots, revealed, hits, sunk)
+
+    def is_finished(self) -> bool:
+        """Returns whether all the boats have been found by the opponent or not"""
+        for state in self.__boats.values():
+            if state == State.NOTSEEN:
+                return False
+        return True
+
+    def del_boat(self, boat_id: int) -> None:
+        """Removes the boat of the given id"""
+        del self.__boats[boat_id]
+        self.__unseen.pop(boat_id, None)
+        for pos in self.__positions(self.__boat_tiles.pop(boat_id, set())):
+            self.__grid.set(pos, None, State.NOTSEEN)
+        if self.__recorder is not None:
+            self.__recorder("del_boat", boat_id)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+from __future__ import annotations
+import argparse
+import random
+import time
+
+from classes import Board
+from typing import Iterable
+
+
+FLEET: tuple[int, ...] = (5, 4, 3, 3, 2)
+"""The length of each boat of the classic fleet"""
+ATTEMPTS: int = 64
+"""The number of random positions tried for a boat before searching all the free positions"""
+
+Placement = tuple[tuple[int, int], tuple[int, int]]
+"""The first and the last tiles of a boat (see `Board.place_boat`)"""
+
+
+class Occupancy:
+    """The taken tiles of a board as one bitmask per line and one per column (bit `x` of line `y` and bit `y` of column `x`), so that whether a boat fits is known with a single mask test. Only the lines and the columns with taken tiles are stored"""
+    def __init__(self, taken: Iterable[tuple[int, int]] = ()) -> None:
+        self.rows: dict[int, int] = {}
+        """The bitmask of the taken tiles of each line"""
+        self.columns: dict[int, int] = {}
+        """The bitmask of the taken tiles of each column"""
+        for x, y in taken:
+            self.take(x, y, 1, True)
+
+    def fits(self, x: int, y: int, length: int, horizontal: bool) -> bool:
+        """Returns whether a boat of the given length starting at the given tile is free of taken tiles"""
+        if horizontal:
+            return not (self.rows.get(y, 0) >> x) & ((1 << length) - 1)
+        return not (self.columns.get(x, 0) >> y) & ((1 << length) - 1)
+
+    def take(self, x: int, y: int, length: int, horizontal: bool) -> None:
+        """Marks the tiles of a boat of the given length starting at the given tile as taken"""
+        if horizontal:
+            self.rows[y] = self.rows.get(y, 0) | ((1 << length) - 1) << x
+            for i in range(x, x + length):
+                self.columns[i] = self.columns.get(i, 0) | 1 << y
+        else:
+            self.columns[x] = self.columns.get(x, 0) | ((1 << length) - 1) << y
+            for j in range(y, y + length):
+                self.rows[j] = self.rows.get(j, 0) | 1 << x
+
+    def free_starts(self, size: tuple[int, int], length: int, horizontal: bool) -> list[tuple[int, int]]:
+        """Returns every tile where a boat of the given length fits, in order"""
+        width, height = size
+        lines, span = (height, width) if horizontal else (width, height)
+        starts: list[tuple[int, int]] = []
+        for line in range(lines):
+            mask: int = (self.rows if horizontal else self.columns).get(line, 0)
+            # a bit is set where the boat would overlap a taken tile
+            blocked: int = 0
+            for i in range(length):
+                blocked |= mask >> i
+            for position in range(span - length + 1):
+                if not (blocked >> position) & 1:
+                    starts.append((position, line) if horizontal else (line, position))
+        return starts
+
+
+def random_fleet(size: tuple[int, int], fleet: tuple[int, ...], rng: random.Random, taken: Iterable[tuple[int, int]] = ()) -> list[Placement]:
+    """Returns where to place boats of the given lengths randomly, horizontally or vertically, without overlapping each other or the given tiles. The placement only depends on the state of the given random generator
+
+    Parameters
+    ----------
+
+    - size: the width and the height of the board
+
+    - fleet: the length of each boat, placed in order
+
+    - rng: the random generator used to place the boats, e.g. `random.Random(seed)`
+
+    - taken: the tiles boats cannot be placed on"""
+    width, height = size
+    occupancy: Occupancy = Occupancy(taken)
+    placements: list[Placement] = []
+    for length in fleet:
+        if length < 1 or length > max(width, height):
+            raise ValueError(f"A boat of length {length} does not fit in a board of size {size}")
+        for attempt in range(ATTEMPTS):
+            horizontal: bool = length <= width and (length > height or rng.random() < 0.5)
+            x: int = rng.randrange(width - length + 1 if horizontal else width)
+            y: int = rng.randrange(height if horizontal else height - length + 1)
+            if occupancy.fits(x, y, length, horizontal):
+                break
+        else:
+            # crowded board: picks one of the free positions left
+            starts: list[tuple[bool, tuple[int, int]]] = [(orientation, start) for orientation in (True, False) if length <= (width if orientation else height) for start in occupancy.free_starts(size, length, orientation)]
+            if not starts:
+                raise ValueError(f"Could not place the fleet {fleet} in a board of size {size}")
+            horizontal, (x, y) = starts[rng.randrange(len(starts))]
+        occupancy.take(x, y, length, horizontal)
+        placements.append(((x, y), (x + length - 1, y) if horizontal else (x, y + length - 1)))
+    return placements
+
+
+def place_fleet(board: Board, fleet: tuple[int, ...], rng: random.Random) -> list[int]:
+    """Places boats of the given lengths randomly on the given board, without overlapping its boats, and returns their ids (see `random_fleet`). The board is left unchanged if the fleet does not fit"""
+    taken: list[tuple[int, int]] = [pos for boat_id in board.boats_view() for pos in board.get_boat_tiles(boat_id)]
+    return [board.place_boat(start, end) for start, end in random_fleet(board.size(), fleet, rng, taken)]
+
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Measures the generation of random fleets")
+    parser.add_argument("--size", type=int, nargs=2, default=(100, 100), metavar=("WIDTH", "HEIGHT"), help="the size of the boards (default: 100 100)")
+    parser.add_argument("--fleet", type=int, nargs="+", default=FLEET, metavar="LENGTH", help="the length of each boat (default: 5 4 3 3 2)")
+    parser.add_argument("--count", type=int, default=10000, help="the number of fleets to generate (default: 10000)")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the random generator (default: 0)")
+    args: argparse.Namespace = parser.parse_args()
+    rng: random.Random = random.Random(args.seed)
+    start_time: float = time.perf_counter()
+    for i in range(args.count):
+        random_fleet(tuple(args.size), tuple(args.fleet), rng)
+    elapsed: float = time.perf_counter() - start_time
+    print(f"{args.count} fleets in {elapsed:.3f} s ({args.count / elapsed:.0f} fleets/s)")
@@ -2,7 +2,9 @@
 # -*- coding: utf-8 -*-
 
 
+import argparse
 import os
+import random
 
 
 os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
@@ -10,14 +12,26 @@ os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
 
 import pygame as pg
 
-from classes import State, Tile, Board
+from boardfile import load_board, read_header, save_board
+from classes import NO_BOAT, State, Board, Salvo
 from colorsys import hsv_to_rgb
 from math import floor
-from typing import Optional
+from profiling import ENABLE_VARIABLE, OUTPUT_VARIABLE, Profiler, from_environment
+from replay import Recorder
+from rules import BoardChanges, History, bomb_area, can_start, replace_fleet
+from typing import Mapping, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 class Ds:
     """Display settings"""
+    MIN_TILE_S: int = 8
+    """The smallest size in pixels of a tile in game: bigger boards do not fit the screen and have to be panned"""
+
     def __init__(self, tile_s: int, x_m: int, y_m: int, half_tile: int) -> None:
         self.tile_s: int = tile_s
         """The size in pixels of a tile (which is represented by a square of `tile_s` by `tile_s`)"""
@@ -27,6 +41,8 @@ class Ds:
         """The margin in pixels at the top of the screen between the border of the screen and the board"""
         self.half_tile_m: int = half_tile
         """The half margin in pixels between tiles"""
+        self.menu: Optional[MenuLayout] = None
+        """The buttons and the grid of the menu, rebuilt on each update made for the menu"""
     def update(self, board: Board, screen: pg.Surface, in_menu: bool = False) -> None:
         """Update the display settings values"""
         self.tile_s = min(
@@ -35,257 +51,663 @@ class Ds:
         )
         self.x_m = (screen.get_size()[0] - (board.size()[0] + (1 if in_menu else 0)) * self.tile_s) // 2
         self.y_m = (screen.get_size()[1] - (board.size()[1] + (1 if in_menu else 0)) * self.tile_s) // 2
+        if not in_menu and self.tile_s < self.MIN_TILE_S:
+            # shows the top left corner of the board
+            self.tile_s = self.MIN_TILE_S
+            self.x_m = 0
+            self.y_m = 0
+        elif in_menu and self.tile_s < 1:
+            # shows the top left corner of the board, the buttons staying on the screen
+            self.tile_s = 1
+            self.x_m = max((screen.get_size()[0] - board.size()[0] - 1) // 2, 0)
+            self.y_m = max((screen.get_size()[1] - board.size()[1] - 1) // 2, 0)
         self.half_tile_m = max(floor(self.tile_s / 40), 1)
+        self.menu = MenuLayout(board, screen, self) if in_menu else None
+
+    def visible_tiles(self, board: Board, screen: pg.Surface) -> tuple[range, range]:
+        """Returns the columns and the lines of the tiles of the given board that are (even partially) on the given screen"""
+        width, height = screen.get_size()
+        return (
+            range(max(0, -self.x_m // self.tile_s), min(board.size()[0], -((self.x_m - width) // self.tile_s))),
+            range(max(0, -self.y_m // self.tile_s), min(board.size()[1], -((self.y_m - height) // self.tile_s)))
+        )
+
+    def tile_at(self, board: Board, pos: tuple[int, int]) -> Optional[tuple[int, int]]:
+        """Returns the position (under the form `(x, y)`) of the tile of the given board under the given point of the screen, if any"""
+        x: int = (pos[0] - self.x_m) // self.tile_s
+        y: int = (pos[1] - self.y_m) // self.tile_s
+        return (x, y) if 0 <= x < board.size()[0] and 0 <= y < board.size()[1] else None
+
+    def pan(self, dx: int, dy: int) -> None:
+        """Moves the board by the given number of pixels"""
+        self.x_m += dx
+        self.y_m += dy
+
+    def zoom(self, factor: float, centre: tuple[int, int]) -> None:
+        """Multiplies the size of the tiles by the given factor (at least `MIN_TILE_S`, so that a frame never draws more tiles than fit the screen at this size: the whole board is shown by the overview), the point of the board under the given point of the screen staying in place"""
+        tile_s: int = max(self.MIN_TILE_S, round(self.tile_s * factor))
+        if tile_s == self.tile_s and factor != 1:
+            tile_s = max(self.MIN_TILE_S, self.tile_s + (1 if factor > 1 else -1))
+        self.x_m = centre[0] - round((centre[0] - self.x_m) * tile_s / self.tile_s)
+        self.y_m = centre[1] - round((centre[1] - self.y_m) * tile_s / self.tile_s)
+        self.tile_s = tile_s
+        self.half_tile_m = max(floor(self.tile_s / 40), 1)
+
+    def centre_on(self, pos: tuple[int, int], screen: pg.Surface) -> None:
+        """Moves the board so that the tile at the given position (under the form `(x, y)`) is at the centre of the given screen"""
+        self.x_m = screen.get_size()[0] // 2 - pos[0] * self.tile_s - self.tile_s // 2
+        self.y_m = screen.get_size()[1] // 2 - pos[1] * self.tile_s - self.tile_s // 2
+
+
+class MenuLayout:
+    """The areas of the menu's buttons and grid for given display settings, so that they are only computed when the display settings change"""
+    BUTTONS: tuple[str, ...] = ("add_row", "del_row", "add_column", "del_column", "start")
 
+    def __init__(self, board: Board, screen: pg.Surface, ds: Ds) -> None:
+        """Inits the layout of the menu of the given board on the given screen with the given display settings (updated for the menu)"""
+        width, height = screen.get_size()
+        t: int = ds.tile_s
+        self.size: tuple[int, int] = board.size()
+        """The width and the height of the board"""
+        self.tile_s: int = t
+        self.grid: pg.Rect = pg.Rect(ds.x_m, ds.y_m, min(self.size[0] * t, width - ds.x_m - t), min(self.size[1] * t, height - ds.y_m - t))
+        """The area of the tiles on the screen, the tiles of boards too big for the screen being cut before the buttons"""
+        self.buttons: dict[str, pg.Rect] = {
+            "add_row": pg.Rect(ds.x_m, height - ds.y_m - t, (width - t) // 2 - ds.x_m, t),
+            "del_row": pg.Rect((width - t) // 2, height - ds.y_m - t, width - ds.x_m - t - (width - t) // 2, t),
+            "add_column": pg.Rect(width - ds.x_m - t, ds.y_m, t, (height - t) // 2 - ds.y_m),
+            "del_column": pg.Rect(width - ds.x_m - t, (height - t) // 2, t, height - ds.y_m - t - (height - t) // 2),
+            "start": pg.Rect(width - ds.x_m - t, height - ds.y_m - t, t, t),
+        }
+        """The area of each button, where it can be clicked"""
+        m: int = ds.half_tile_m
+        self.faces: dict[str, pg.Rect] = {
+            "add_row": pg.Rect(ds.x_m + m, height - ds.y_m - t + m, (width - t) // 2 - ds.x_m - 2 * m, t - 2 * m),
+            "del_row": pg.Rect((width - t) // 2 + m, height - ds.y_m - t + m, (width - t) // 2 - ds.x_m - 2 * m, t - 2 * m),
+            "add_column": pg.Rect(width - ds.x_m - t + m, ds.y_m + m, t - 2 * m, (height - t) // 2 - ds.y_m - 2 * m),
+            "del_column": pg.Rect(width - ds.x_m - t + m, (height - t) // 2 + m, t - 2 * m, (height - t) // 2 - ds.y_m - 2 * m),
+            "start": pg.Rect(width - ds.x_m - t + m, height - ds.y_m - t + m, t - 2 * m, t - 2 * m),
+        }
+        """The drawn part of each button, inside its area"""
 
-def draw_board(board: Board, screen: pg.Surface, ds: Ds, super: bool) -> None:
-    """Displays the given board on the given screen
+    def tile_at(self, pos: tuple[int, int]) -> Optional[tuple[int, int]]:
+        """Returns the position (under the form `(x, y)`) of the tile under the given point of the screen, if any"""
+        if not self.grid.collidepoint(pos):
+            return None
+        return ((pos[0] - self.grid.x) // self.tile_s, (pos[1] - self.grid.y) // self.tile_s)
+
+    def button_at(self, pos: tuple[int, int]) -> Optional[str]:
+        """Returns the name of the button under the given point of the screen (see `BUTTONS`), if any"""
+        # the buttons are below and on the right of the grid
+        if pos[0] < self.grid.right and pos[1] < self.grid.bottom:
+            return None
+        for name in self.BUTTONS:
+            if self.buttons[name].collidepoint(pos):
+                return name
+        return None
+
+
+def boat_colours(boats: Mapping[int, State]) -> dict[int, tuple[int, int, int]]:
+    """Returns the custom colour of each of the given boats based on their id"""
+    colours: dict[int, tuple[int, int, int]] = {}
+    for index, boat_id in enumerate(sorted(boats.keys())):
+        r, g, b = hsv_to_rgb(index / (len(boats) + 1), 1.0, 1.0)
+        colours[boat_id] = (int(r * 255), int(g * 255), int(b * 255))
+    return colours
+
+
+def tile_colour(board: Board, pos: tuple[int, int], super: bool, boats: Mapping[int, State], colours: dict[int, tuple[int, int, int]]) -> tuple[int, int, int]:
+    """Returns the colour of the tile at the given position (under the form `(x, y)`) of the given board
     
     Parameters
     ----------
     
-    - board: the board to display
+    - board: the board the tile belongs to
     
-    - screen: the window where to display the given board
+    - pos: the position of the tile
     
-    - ds: the display settings containings sizes of various margins
+    - super: whether all tiles are displayed (see `draw_board`)
+    
+    - boats: the boats of the given board (see `Board.boats_view`)
     
-    - super: whether all tile should be displayed (as in menu) (value = True) or only those that have been seen (as in game) (valule = False)"""
+    - colours: the colours of the boats of the given board (see `boat_colours`)"""
+    return state_colour(board.boat_id_at(pos), board.state_at(pos), super, boats, colours)
+
+
+def state_colour(boat_id: Optional[int], state: State, super: bool, boats: Mapping[int, State], colours: dict[int, tuple[int, int, int]]) -> tuple[int, int, int]:
+    """Returns the colour of a tile of the given boat (`None` if no boat) in the given state (see `tile_colour`)"""
     # colours
     GREY: tuple[int, int, int] = (125, 125, 125)
     WHITE: tuple[int, int, int] = (255, 255, 255)
     DARK_BLUE: tuple[int, int, int] = (0, 64, 108)
-    def boat_colour(boat_id: int, boats: dict[int, State]) -> tuple[int, int, int]:
-        """Custom boats colours based on their id"""
-        r, g, b = hsv_to_rgb(sorted(boats.keys()).index(boat_id) / (len(boats) + 1), 1.0, 1.0)
-        return (int(r * 255), int(g * 255), int(b * 255))
+    if not super and state == State.NOTSEEN:
+        return GREY
+    elif boat_id is None:
+        return DARK_BLUE
+    elif super or boats[boat_id] == State.SEEN:
+        return colours[boat_id]
+    else:
+        return WHITE
+
+
+class TileAtlas:
+    """Pre-rendered tiles of each colour at the current size, drawn in batches of blits instead of one `pg.draw.rect` per tile"""
+    def __init__(self) -> None:
+        self.__sprites: dict[tuple[int, int, int], pg.Surface] = {}
+        self.__size: tuple[int, int] = (0, 0)
+        """The size of the tiles and of their margins the sprites were rendered for"""
+
+    def sprite(self, colour: tuple[int, int, int], ds: Ds) -> pg.Surface:
+        """Returns the tile of the given colour at the size given by the display settings"""
+        if self.__size != (ds.tile_s, ds.half_tile_m):
+            self.__sprites.clear()
+            self.__size = (ds.tile_s, ds.half_tile_m)
+        if colour not in self.__sprites:
+            sprite: pg.Surface = pg.Surface((max(ds.tile_s - 2 * ds.half_tile_m, 1),) * 2)
+            sprite.fill(colour)
+            self.__sprites[colour] = sprite
+        return self.__sprites[colour]
+
+    def offset(self, ds: Ds) -> int:
+        """Returns the position of the sprites inside the tiles, i.e. their margin"""
+        return ds.half_tile_m if ds.tile_s - 2 * ds.half_tile_m >= 1 else 0
+
+    @staticmethod
+    def blit(screen: pg.Surface, sprites: list[tuple[pg.Surface, tuple[int, int]]]) -> None:
+        """Draws the given sprites at the given positions all at once"""
+        if hasattr(screen, "fblits"):
+            screen.fblits(sprites)
+        else:
+            screen.blits(sprites, doreturn=False)
+
+
+def draw_board(board: Board, screen: pg.Surface, ds: Ds, super: bool, atlas: Optional[TileAtlas] = None, colours: Optional[dict[int, tuple[int, int, int]]] = None) -> None:
+    """Displays the given board on the given screen. Only the tiles on the screen are drawn
+    
+    Parameters
+    ----------
+    
+    - board: the board to display
+    
+    - screen: the window where to display the given board
+    
+    - ds: the display settings containings sizes of various margins
+    
+    - super: whether all tiles are displayed (as in menu) (value = True) or only those that have been seen (as in game) (value = False)
+    
+    - atlas: the pre-rendered tiles to use, kept from one frame to another. A new one is used if none is given
+    
+    - colours: the colours of the boats of the given board, kept from one frame to another (see `boat_colours`). They are computed if none are given"""
+    boats: Mapping[int, State] = board.boats_view()
+    colours = colours if colours is not None else boat_colours(boats)
+    atlas = atlas if atlas is not None else TileAtlas()
+    offset: int = atlas.offset(ds)
+    columns, lines = ds.visible_tiles(board, screen)
     # start drawing
-    for y in range(board.size()[1]):
-        for x in range(board.size()[0]):
-            current_tile: Tile = board.get_tile_at((x, y))
-            colour: tuple[int, int, int]
-            if current_tile.get_state() == State.NOTSEEN and not super:
-                colour = GREY
-            elif current_tile.get_boat_id() is None:
-                colour = DARK_BLUE
-            elif super or board.get_boats()[current_tile.get_boat_id()] == State.SEEN:
-                colour = boat_colour(current_tile.get_boat_id(), board.get_boats())
-            else:
-                colour = WHITE
-            pg.draw.rect(screen, colour, (
-                x * ds.tile_s + ds.x_m + ds.half_tile_m,
-                y * ds.tile_s + ds.y_m + ds.half_tile_m,
-                ds.tile_s - 2 * ds.half_tile_m,
-                ds.tile_s - 2 * ds.half_tile_m
-            ))
-
-
-def main() -> None:
-    """Launches the game"""
+    sprites: list[tuple[pg.Surface, tuple[int, int]]] = []
+    for y in lines:
+        for x in columns:
+            sprites.append((atlas.sprite(tile_colour(board, (x, y), super, boats, colours), ds), (x * ds.tile_s + ds.x_m + offset, y * ds.tile_s + ds.y_m + offset)))
+    atlas.blit(screen, sprites)
+
+
+def draw_overview(board: Board, screen: pg.Surface, background: tuple[int, int, int], super: bool, resolution: int = 512, colours: Optional[dict[int, tuple[int, int, int]]] = None) -> tuple[pg.Rect, float]:
+    """Displays the whole given board, downsampled to fit the given screen: each pixel of the overview shows one tile out of each block of tiles. Returns where the overview is on the screen and the number of tiles per pixel of it
+    
+    Parameters
+    ----------
+    
+    - board: the board to display
+    
+    - screen: the window where to display the given board
+    
+    - background: the colour of the screen around the overview
+    
+    - super: whether all tiles are displayed (see `draw_board`)
+    
+    - resolution: the maximum number of tiles sampled along each side of the board, so that the cost does not depend on the size of the board
+    
+    - colours: the colours of the boats of the given board (see `draw_board`)"""
+    width, height = board.size()
+    scale: float = max(width / min(resolution, screen.get_size()[0]), height / min(resolution, screen.get_size()[1]), 1 / Ds.MIN_TILE_S)
+    columns: list[int] = [min(width - 1, floor(i * scale)) for i in range(max(1, floor(width / scale)))]
+    lines: list[int] = [min(height - 1, floor(j * scale)) for j in range(max(1, floor(height / scale)))]
+    boats: Mapping[int, State] = board.boats_view()
+    colours = colours if colours is not None else boat_colours(boats)
+    sample: pg.Surface = pg.Surface((len(columns), len(lines)))
+    if np is not None and board.is_packed():
+        # samples the planes of the board all at once
+        ids = np.asarray(board.get_id_plane())[np.ix_(lines, columns)]
+        seen = np.asarray(board.get_state_plane())[np.ix_(lines, columns)] | super
+        # one colour per id sampled, looked up for every pixel at once
+        unique_ids, inverse = np.unique(ids, return_inverse=True)
+        palette = np.array([state_colour(None if boat_id == NO_BOAT else boat_id, State.SEEN, super, boats, colours) for boat_id in unique_ids.tolist()], dtype=np.uint8)
+        pixels = palette[inverse.reshape(ids.shape)]
+        pixels[~seen] = state_colour(None, State.NOTSEEN, super, boats, colours)
+        pg.surfarray.blit_array(sample, pixels.transpose(1, 0, 2))
+    else:
+        # the colour of each boat id, for the seen and the unseen tiles, written line by line into a buffer
+        seen_palette: dict[Optional[int], bytes] = {}
+        unseen_palette: dict[Optional[int], bytes] = {}
+        buffer: bytearray = bytearray()
+        for y in lines:
+            row: list[tuple[Optional[int], State]] = list(board.iter_row(y))
+            for x in columns:
+                boat_id, state = row[x]
+                palette: dict[Optional[int], bytes] = seen_palette if state is State.SEEN else unseen_palette
+                colour: Optional[bytes] = palette.get(boat_id)
+                if colour is None:
+                    colour = palette[boat_id] = bytes(state_colour(boat_id, state, super, boats, colours))
+                buffer += colour
+        sample = pg.image.frombuffer(buffer, (len(columns), len(lines)), "RGB")
+    factor: float = min(screen.get_size()[0] / len(columns), screen.get_size()[1] / len(lines))
+    overview: pg.Surface = pg.transform.scale(sample, (floor(len(columns) * factor), floor(len(lines) * factor)))
+    rect: pg.Rect = overview.get_rect(center=screen.get_rect().center)
+    screen.fill(background)
+    screen.blit(overview, rect)
+    return (rect, scale / factor)
+
+
+class BoardRenderer(BoardChanges):
+    """Draws a board incrementally: only the tiles marked as changed since the last frame are drawn again (see `rules.BoardChanges`)"""
+    def __init__(self, board: Board, screen: pg.Surface, ds: Ds, background: tuple[int, int, int]) -> None:
+        """Inits a renderer. Its first frame draws the whole screen
+        
+        Parameters
+        ----------
+        
+        - board: the board to display
+        
+        - screen: the window where to display the given board
+        
+        - ds: the display settings containings sizes of various margins
+        
+        - background: the colour of the screen around the tiles"""
+        super().__init__(board)
+        self.__screen: pg.Surface = screen
+        self.__ds: Ds = ds
+        self.__background: tuple[int, int, int] = background
+        self.__colours: dict[int, tuple[int, int, int]] = {}
+        self.__atlas: TileAtlas = TileAtlas()
+        self.__overview: Optional[tuple[pg.Rect, float]] = None
+        """Where the overview is on the screen and the number of tiles per pixel of it, if the overview is displayed (see `draw_overview`)"""
+        self.__overview_on: bool = False
+
+    def set_overview(self, overview: bool) -> None:
+        """Displays the whole board downsampled to fit the screen (value = True) or the tiles at the size of the display settings (value = False)"""
+        if overview != self.__overview_on:
+            self.__overview_on = overview
+            self.invalidate()
+
+    def is_overview(self) -> bool:
+        """Returns whether the overview is displayed (see `set_overview`)"""
+        return self.__overview_on
+
+    def overview_tile_at(self, pos: tuple[int, int]) -> Optional[tuple[int, int]]:
+        """Returns the position (under the form `(x, y)`) of the tile under the given point of the overview, if any"""
+        if self.__overview is None or not self.__overview[0].collidepoint(pos):
+            return None
+        rect, scale = self.__overview
+        return (
+            min(self.board().size()[0] - 1, floor((pos[0] - rect.x) * scale)),
+            min(self.board().size()[1] - 1, floor((pos[1] - rect.y) * scale))
+        )
+
+    def draw(self, super: bool) -> list[pg.Rect]:
+        """Draws the tiles that changed since the last frame and returns the areas of the screen to update (see `pg.display.update`)
+        
+        Parameters
+        ----------
+        
+        - super: whether all tiles are displayed (see `draw_board`). Changing it draws the whole board again"""
+        board: Board = self.board()
+        boats: Mapping[int, State] = board.boats_view()
+        fleet_changed, dirty = self.next_frame(super)
+        if fleet_changed:
+            self.__colours = boat_colours(boats)
+        if self.__overview_on:
+            # the overview is only drawn again when something changed
+            if dirty is not None and not dirty:
+                return []
+            self.__overview = draw_overview(board, self.__screen, self.__background, super, colours=self.__colours)
+            return [self.__screen.get_rect()]
+        ds: Ds = self.__ds
+        if dirty is None:
+            self.__screen.fill(self.__background)
+            draw_board(board, self.__screen, ds, super, self.__atlas, self.__colours)
+            return [self.__screen.get_rect()]
+        columns, lines = ds.visible_tiles(board, self.__screen)
+        offset: int = self.__atlas.offset(ds)
+        sprites: list[tuple[pg.Surface, tuple[int, int]]] = []
+        rects: list[pg.Rect] = []
+        for x, y in dirty:
+            if x not in columns or y not in lines:
+                continue
+            rect: pg.Rect = pg.Rect(x * ds.tile_s + ds.x_m, y * ds.tile_s + ds.y_m, ds.tile_s, ds.tile_s)
+            self.__screen.fill(self.__background, rect)
+            sprites.append((self.__atlas.sprite(tile_colour(board, (x, y), super, boats, self.__colours), ds), (rect.x + offset, rect.y + offset)))
+            rects.append(rect)
+        self.__atlas.blit(self.__screen, sprites)
+        return rects
+
+
+class Scheduler:
+    """Paces a main loop: blocks while waiting for events when there is nothing to draw and caps the frame rate otherwise"""
+    def __init__(self, fps: int, idle_timeout: int = 1000) -> None:
+        """Inits a scheduler. Its first frame is always drawn
+        
+        Parameters
+        ----------
+        
+        - fps: the maximum number of frames drawn per second
+        
+        - idle_timeout: the maximum time in milliseconds to wait for an event when there is nothing to draw"""
+        self.fps: int = fps
+        """The maximum number of frames drawn per second"""
+        self.idle_timeout: int = idle_timeout
+        """The maximum time in milliseconds to wait for an event when there is nothing to draw"""
+        self.__clock: pg.time.Clock = pg.time.Clock()
+        self.__redraw: bool = True
+        """Whether something changed since the last frame"""
+
+    def events(self) -> list[pg.event.Event]:
+        """Returns the pending events. If there is nothing to draw, waits for at least one of them (or for `idle_timeout`). Any event but a mouse motion requests a new frame"""
+        if self.__redraw:
+            events: list[pg.event.Event] = pg.event.get()
+        else:
+            event: pg.event.Event = pg.event.wait(self.idle_timeout)
+            events: list[pg.event.Event] = [] if event.type == pg.NOEVENT else [event] + pg.event.get()
+        for event in events:
+            if event.type != pg.MOUSEMOTION:
+                self.__redraw = True
+        return events
+
+    def request_redraw(self) -> None:
+        """Requests a new frame even though no event happened"""
+        self.__redraw = True
+
+    def should_draw(self) -> bool:
+        """Returns whether a new frame has to be drawn. Calling this method consumes the request: it waits first if the last frame was drawn too recently to respect `fps`"""
+        if not self.__redraw:
+            return False
+        self.__redraw = False
+        self.__clock.tick(self.fps)
+        return True
+
+
+def save_and_report(board: Board, path: str, started: bool = False) -> None:
+    """Saves the given board (see `boardfile.save_board`) and shows whether it worked in the title of the window, so that a failure, e.g. a full disk, does not end the game"""
+    try:
+        save_board(board, path, started)
+    except OSError as error:
+        pg.display.set_caption(f"Battleship - could not save to {path}: {error}")
+    else:
+        pg.display.set_caption(f"Battleship - saved to {path}")
+
+
+def main(fps: int = 60, load: Optional[str] = None, save: str = "battleship.bsb", record: Optional[str] = None, profiler: Optional[Profiler] = None, seed: Optional[int] = None, bomb: int = 1) -> None:
+    """Launches the game
+    
+    Parameters
+    ----------
+    
+    - fps: the maximum number of frames drawn per second
+    
+    - load: the path of a board file to start from. A board saved while being guessed resumes the game directly
+    
+    - save: the path of the board file written when pressing S
+    
+    - record: the path of a replay log where to record every change of the board (see `replay.Recorder`)
+    
+    - profiler: what times the phases of each frame. If none, it is enabled by the environment variables only (see `profiling.from_environment`)
+    
+    - seed: the seed of the random fleets placed when pressing R in the menu. If none, they differ at each launch
+    
+    - bomb: the side of the square of tiles guessed by each click, centred on the clicked tile (see `Board.guess_area`). What each bomb revealed is shown in the window's title"""
     pg.init()
+    recorder: Optional[Recorder] = None
+    profiler = profiler if profiler is not None else from_environment()
     try:
         # the game board
-        board: Board = Board((8, 8))
+        board: Board = Board((8, 8)) if load is None else load_board(load)
+        if record is not None:
+            recorder = Recorder(board, record)
         # the representation of the game window
         screen: pg.Surface = pg.display.set_mode((0, 0), pg.FULLSCREEN)
         # display settings
         ds: Ds = Ds(0, 0, 0, 0)
         ds.update(board, screen, True)
         # whether the menu is finished
-        menu_end: bool = False
+        menu_end: bool = load is not None and read_header(load).is_started()
         # whether the game is finished
-        game_end: bool = True
-        # position x of the mouse when trying to place a boat in the menu
-        boat_start_x: Optional[int] = None
-        # position y of the mouse when trying to place a boat in the menu
-        boat_start_y: Optional[int] = None
+        game_end: bool = not menu_end
+        # the tile where the mouse was pressed when trying to place a boat in the menu
+        boat_start: Optional[tuple[int, int]] = None
+        # the boards before each change made in the menu, for undo and redo
+        history: History = History()
+
         # colours
         GREEN: tuple[int, int, int] = (0, 255, 0)
         RED: tuple[int, int, int] = (255, 0, 0)
         GREY: tuple[int, int, int] = (125, 125, 125)
         YELLOW: tuple[int, int, int] = (255, 255, 0)
         BLACK: tuple[int, int, int] = (0, 0, 0)
+        # places the random fleets (R key)
+        rng: random.Random = random.Random(seed)
+        # paces the menu and the game loops
+        scheduler: Scheduler = Scheduler(fps)
         # ---------- MENU ---------- #
         while not menu_end:
-            for event in pg.event.get():
-                if event.type == pg.MOUSEBUTTONDOWN:
-                    mouse_x, mouse_y = pg.mouse.get_pos()
-                    # if the mouse is not in the margins then
-                    if ds.x_m <= mouse_x <= screen.get_size()[0] - ds.x_m and ds.y_m <= mouse_y <= screen.get_size()[1] - ds.y_m:
-                        # if mouse is on the 'add row' button then
-                        if ds.x_m <= mouse_x <= (screen.get_size()[0] - ds.tile_s) // 2 and screen.get_size()[1] - ds.y_m - ds.tile_s <= mouse_y <= screen.get_size()[1] - ds.y_m:
+            with profiler.phase("wait"):
+                events: list[pg.event.Event] = scheduler.events()
+            with profiler.phase("events"):
+                for event in events:
+                    if event.type == pg.MOUSEBUTTONDOWN:
+                        mouse: tuple[int, int] = pg.mouse.get_pos()
+                        button: Optional[str] = ds.menu.button_at(mouse)
+                        # if the mouse is on the 'add row' button then
+                        if button == "add_row":
                             # add a row to the board
-                            board.add_row()
+                            with profiler.phase("board"):
+                                history.checkpoint(board)
+                                board.add_row()
                             # update size of tiles and margins' width
                             ds.update(board, screen, True)
                         # if the mouse is on the 'del row' button and the board has more than 1 row then
-                        elif (screen.get_size()[0] - ds.tile_s) // 2 <= mouse_x <= screen.get_size()[0] - ds.x_m - ds.tile_s and screen.get_size()[1] - ds.y_m - ds.tile_s <= mouse_y <= screen.get_size()[1] - ds.y_m:
+                        elif button == "del_row":
                             if board.size()[1] > 1:
                                 # delete a row to the board
-                                board.del_row()
+                                with profiler.phase("board"):
+                                    history.checkpoint(board)
+                                    board.del_row()
                                 # update size of tiles and margins' width
                                 ds.update(board, screen, True)
-                        # if mouse is on the 'add column' button then
-                        elif screen.get_size()[0] - ds.x_m - ds.tile_s <= mouse_x <= screen.get_size()[0] - ds.x_m and ds.y_m <= mouse_y <= (screen.get_size()[1] - ds.tile_s) // 2:
+                        # if the mouse is on the 'add column' button then
+                        elif button == "add_column":
                             # add a column to the board
-                            board.add_column()
+                            with profiler.phase("board"):
+                                history.checkpoint(board)
+                                board.add_column()
                             # update size of tiles and margins' width
                             ds.update(board, screen, True)
                         # if the mouse is on the 'del column' button and the board has more than 1 column then
-                        elif screen.get_size()[0] - ds.x_m - ds.tile_s <= mouse_x <= screen.get_size()[0] - ds.x_m and (screen.get_size()[1] - ds.tile_s) // 2 <= mouse_y <= screen.get_size()[1] - ds.y_m - ds.tile_s:
+                        elif button == "del_column":
                             if board.size()[0] > 1:
                                 # delete a column to the board
-                                board.del_column()
+                                with profiler.phase("board"):
+                                    history.checkpoint(board)
+                                    board.del_column()
                                 # update size of tiles and margins' width
                                 ds.update(board, screen, True)
-                        # if the mouse is on the start button and at least one boat has been placedthen
-                        elif screen.get_size()[0] - ds.x_m - ds.tile_s <= mouse_x <= screen.get_size()[0] - ds.x_m and screen.get_size()[1] - ds.y_m - ds.tile_s <= mouse_y <= screen.get_size()[1] - ds.y_m:
-                            if len(board.get_boats().keys()) > 0:
+                        # if the mouse is on the start button and at least one boat has been placed then
+                        elif button == "start":
+                            if can_start(board):
                                 # end the menu
                                 menu_end: bool = True
                                 # start the game
                                 game_end: bool = False
-                        # else the mouse is on the grid then
-                        else:
-                            current_tile: Tile = board.get_tile_at(((mouse_x - ds.x_m) // ds.tile_s, (mouse_y - ds.y_m) // ds.tile_s))
-                            if current_tile.get_boat_id() is not None:
+                        # else if the mouse is on the grid then
+                        elif ds.menu.tile_at(mouse) is not None:
+                            boat_start: Optional[tuple[int, int]] = ds.menu.tile_at(mouse)
+                            boat_id: Optional[int] = board.boat_id_at(boat_start)
+                            if boat_id is not None:
                                 # delete the selected boat
-                                board.del_boat(current_tile.get_boat_id())
-                            else:
-                                # prepare to add a new boat
-                                boat_start_x: Optional[int] = (mouse_x - ds.x_m) // ds.tile_s
-                                boat_start_y: Optional[int] = (mouse_y - ds.y_m) // ds.tile_s
-                elif event.type == pg.MOUSEBUTTONUP:
-                    mouse_x, mouse_y = pg.mouse.get_pos()
-                    # if the mouse is on the grid and one tile has been selected then
-                    if ds.x_m <= mouse_x < screen.get_size()[0] - ds.x_m - ds.tile_s and ds.y_m <= mouse_y < screen.get_size()[1] - ds.y_m - ds.tile_s and boat_start_x != None and boat_start_y != None:
-                        #  add a boat from the mouse's click position to the mouse's release position
-                        boat_end_x = (mouse_x - ds.x_m) // ds.tile_s
-                        boat_end_y = (mouse_y - ds.y_m) // ds.tile_s
-                        if len(board.get_boats().keys()) == 0:
-                            new_boat_id: int = 0
-                        else:
-                            new_boat_id: int = sorted(board.get_boats().keys())[-1] + 1
-                        # determines whether the boat is horizonal or vertical
-                        if abs(boat_end_x - boat_start_x) >= abs(boat_end_y - boat_start_y):
-                            if boat_end_x - boat_start_x > 0:
-                                for i in range(abs(boat_end_x - boat_start_x) + 1):
-                                    position: tuple[int, int] = (boat_start_x + i, boat_start_y)
-                                    if board.get_tile_at(position).get_boat_id() is not None:
-                                        board.del_boat(board.get_tile_at(position).get_boat_id())
-                                    board.set_tile_at(Tile(new_boat_id, State.NOTSEEN), position)
-                            else:
-                                for i in range(abs(boat_end_x - boat_start_x) + 1):
-                                    position: tuple[int, int] = (boat_start_x - i, boat_start_y)
-                                    if board.get_tile_at(position).get_boat_id() is not None:
-                                        board.del_boat(board.get_tile_at(position).get_boat_id())
-                                    board.set_tile_at(Tile(new_boat_id, State.NOTSEEN), position)
-                        else:
-                            if boat_end_y - boat_start_y > 0:
-                                for i in range(abs(boat_end_y - boat_start_y) + 1):
-                                    position: tuple[int, int] = (boat_start_x, boat_start_y + i)
-                                    if board.get_tile_at(position).get_boat_id() is not None:
-                                        board.del_boat(board.get_tile_at(position).get_boat_id())
-                                    board.set_tile_at(Tile(new_boat_id, State.NOTSEEN), position)
-                            else:
-                                for i in range(abs(boat_end_y - boat_start_y) + 1):
-                                    position: tuple[int, int] = (boat_start_x, boat_start_y - i)
-                                    if board.get_tile_at(position).get_boat_id() is not None:
-                                        board.del_boat(board.get_tile_at(position).get_boat_id())
-                                    board.set_tile_at(Tile(new_boat_id, State.NOTSEEN), position)
-                        boat_start_x: Optional[int] = None
-                        boat_start_y: Optional[int] = None
-                elif event.type == pg.KEYDOWN:
-                    if event.key == pg.K_ESCAPE:
+                                with profiler.phase("board"):
+                                    history.checkpoint(board)
+                                    board.del_boat(boat_id)
+                                boat_start = None
+                    elif event.type == pg.MOUSEBUTTONUP:
+                        boat_end: Optional[tuple[int, int]] = ds.menu.tile_at(pg.mouse.get_pos())
+                        # if the mouse is on the grid and one tile has been selected then
+                        if boat_end is not None and boat_start is not None:
+                            # add a boat from the mouse's click position to the mouse's release position
+                            with profiler.phase("board"):
+                                history.checkpoint(board)
+                                board.place_boat(boat_start, boat_end)
+                            boat_start = None
+                    elif event.type == pg.KEYDOWN:
+                        if event.key == pg.K_ESCAPE:
+                            menu_end: bool = True
+                        if event.key == pg.K_p:
+                            print(board)
+                        if event.key == pg.K_s:
+                            save_and_report(board, save)
+                        # replace the boats with a random fleet, if it fits in the board
+                        if event.key == pg.K_r:
+                            with profiler.phase("board"):
+                                replace_fleet(board, rng, history)
+                        # undo (Z) or redo (Y) the last change of the board
+                        restored: Optional[Board] = history.undo(board) if event.key == pg.K_z else history.redo(board) if event.key == pg.K_y else None
+                        if restored is not None:
+                            board = restored
+                            if recorder is not None:
+                                recorder.attach(board)
+                            ds.update(board, screen, True)
+                    elif event.type == pg.QUIT:
                         menu_end: bool = True
-                    if event.key == pg.K_p:
-                        print(board)
-                elif event.type == pg.QUIT:
-                    menu_end: bool = True
-            # draw background
-            screen.fill(BLACK)
-            # draw menu buttons
-            # add row button
-            colour: tuple[int, int, int] = GREEN
-            pg.draw.rect(screen, colour, (
-                ds.x_m + ds.half_tile_m,
-                screen.get_size()[1] - ds.y_m - ds.tile_s + ds.half_tile_m,
-                (screen.get_size()[0] - ds.tile_s) // 2 - ds.x_m - 2 * ds.half_tile_m,
-                ds.tile_s - 2 * ds.half_tile_m
-            ))
-            # del row button
-            colour: tuple[int, int, int] = RED if board.size()[1] > 1 else GREY
-            pg.draw.rect(screen, colour, (
-                (screen.get_size()[0] - ds.tile_s) // 2 + ds.half_tile_m,
-                screen.get_size()[1] - ds.y_m - ds.tile_s + ds.half_tile_m,
-                (screen.get_size()[0] - ds.tile_s) // 2 - ds.x_m - 2 * ds.half_tile_m,
-                ds.tile_s - 2 * ds.half_tile_m
-            ))
-            # add column button
-            colour: tuple[int, int, int] = GREEN
-            pg.draw.rect(screen, colour, (
-                screen.get_size()[0] - ds.x_m - ds.tile_s + ds.half_tile_m,
-                ds.y_m + ds.half_tile_m,
-                ds.tile_s - 2 * ds.half_tile_m,
-                (screen.get_size()[1] - ds.tile_s) // 2 - ds.y_m - 2 * ds.half_tile_m
-            ))
-            # del column button
-            colour: tuple[int, int, int] = RED if board.size()[0] > 1 else GREY
-            pg.draw.rect(screen, colour, (
-                screen.get_size()[0] - ds.x_m - ds.tile_s + ds.half_tile_m,
-                (screen.get_size()[1] - ds.tile_s) // 2 + ds.half_tile_m,
-                ds.tile_s - 2 * ds.half_tile_m,
-                (screen.get_size()[1] - ds.tile_s) // 2 - ds.y_m - 2 * ds.half_tile_m
-            ))
-            # start button
-            colour: tuple[int, int, int] = YELLOW if len(board.get_boats().keys()) > 0 else GREY
-            pg.draw.rect(screen, colour, (
-                screen.get_size()[0] - ds.x_m - ds.tile_s + ds.half_tile_m,
-                screen.get_size()[1] - ds.y_m - ds.tile_s + ds.half_tile_m,
-                ds.tile_s - 2 * ds.half_tile_m,
-                ds.tile_s - 2 * ds.half_tile_m
-            ))
-            # draw board
-            draw_board(board, screen, ds, True)
-            pg.display.flip()
+            with profiler.phase("wait"):
+                draw: bool = not menu_end and scheduler.should_draw()
+            if not draw:
+                continue
+            with profiler.phase("draw"):
+                # draw background
+                screen.fill(BLACK)
+                # draw menu buttons
+                colours: dict[str, tuple[int, int, int]] = {
+                    "add_row": GREEN,
+                    "del_row": RED if board.size()[1] > 1 else GREY,
+                    "add_column": GREEN,
+                    "del_column": RED if board.size()[0] > 1 else GREY,
+                    "start": YELLOW if len(board.boats_view()) > 0 else GREY,
+                }
+                for name, face in ds.menu.faces.items():
+                    pg.draw.rect(screen, colours[name], face)
+                # draw board, without covering the buttons
+                screen.set_clip(ds.menu.grid)
+                draw_board(board, screen, ds, True)
+                screen.set_clip(None)
+                profiler.draw_overlay(screen)
+            with profiler.phase("flip"):
+                pg.display.flip()
+            profiler.end_frame()
         if not game_end:
             ds.update(board, screen, False)
-            # draw background
-            screen.fill(BLACK)
-            # draw board
-            draw_board(board, screen, ds, False)
-            # refresh screen
-            pg.display.flip()
+            # draws only what changed from one frame to the next
+            renderer: BoardRenderer = BoardRenderer(board, screen, ds, BLACK)
         # ---------- GAME ---------- #
+        # arrows kept pressed pan continuously
+        pg.key.set_repeat(300, 30)
         while not game_end:
-            for event in pg.event.get():
-                if event.type == pg.MOUSEBUTTONDOWN:
-                    mouse_x, mouse_y = pg.mouse.get_pos()
-                    if ds.x_m <= mouse_x < screen.get_size()[0] - ds.x_m and ds.y_m <= mouse_y < screen.get_size()[1] - ds.y_m:
-                        board.guess_tile(((mouse_x - ds.x_m) // ds.tile_s, (mouse_y - ds.y_m) // ds.tile_s))
-                        if board.is_finished():
-                            # draw background
-                            screen.fill(GREEN)
-                            # draw board
-                            draw_board(board, screen, ds, False)
-                            # refresh screen
-                            pg.display.flip()
-                            pg.time.delay(3000)
+            with profiler.phase("wait"):
+                events: list[pg.event.Event] = scheduler.events()
+            with profiler.phase("events"):
+                for event in events:
+                    if event.type == pg.MOUSEBUTTONDOWN and event.button <= 3:
+                        if renderer.is_overview():
+                            # shows the tiles around the clicked point
+                            target: Optional[tuple[int, int]] = renderer.overview_tile_at(pg.mouse.get_pos())
+                            if target is not None:
+                                ds.centre_on(target, screen)
+                                renderer.set_overview(False)
+                            continue
+                        position: Optional[tuple[int, int]] = ds.tile_at(board, pg.mouse.get_pos())
+                        if position is not None:
+                            if bomb > 1:
+                                with profiler.phase("board"):
+                                    salvo: Salvo = board.guess_area(bomb_area(position, bomb))
+                                renderer.mark_salvo(salvo)
+                                pg.display.set_caption(f"Battleship - {salvo}")
+                            else:
+                                with profiler.phase("board"):
+                                    board.guess_tile(position)
+                                renderer.mark_guess(position)
+                            if board.is_finished():
+                                # draw background
+                                screen.fill(GREEN)
+                                # draw board
+                                draw_board(board, screen, ds, False)
+                                # refresh screen
+                                pg.display.flip()
+                                pg.time.delay(3000)
+                                game_end = True
+                    elif event.type == pg.MOUSEWHEEL and not renderer.is_overview():
+                        ds.zoom(1.25 ** event.y, pg.mouse.get_pos())
+                        renderer.invalidate()
+                    elif event.type == pg.KEYDOWN:
+                        if event.key == pg.K_ESCAPE:
                             game_end = True
-                elif event.type == pg.KEYDOWN:
-                    if event.key == pg.K_ESCAPE:
+                        if event.key == pg.K_s:
+                            save_and_report(board, save, True)
+                        if event.key == pg.K_o:
+                            renderer.set_overview(not renderer.is_overview())
+                        if renderer.is_overview():
+                            continue
+                        if event.key in (pg.K_PLUS, pg.K_EQUALS, pg.K_KP_PLUS, pg.K_MINUS, pg.K_KP_MINUS):
+                            ds.zoom(1.25 if event.key in (pg.K_PLUS, pg.K_EQUALS, pg.K_KP_PLUS) else 0.8, screen.get_rect().center)
+                            renderer.invalidate()
+                        if event.key in (pg.K_LEFT, pg.K_RIGHT, pg.K_UP, pg.K_DOWN):
+                            # moves the board by a quarter of the screen
+                            step: int = max(screen.get_size()) // 4
+                            ds.pan(
+                                step * ((event.key == pg.K_LEFT) - (event.key == pg.K_RIGHT)),
+                                step * ((event.key == pg.K_UP) - (event.key == pg.K_DOWN))
+                            )
+                            renderer.invalidate()
+                    elif event.type in (pg.WINDOWEXPOSED, pg.WINDOWRESTORED, pg.VIDEOEXPOSE):
+                        # the window was covered or minimized, which may have erased what was drawn
+                        renderer.invalidate()
+                    elif event.type == pg.QUIT:
                         game_end = True
-                elif event.type == pg.QUIT:
-                    game_end = True
-            # draw background
-            screen.fill(BLACK)
-            # draw board
-            draw_board(board, screen, ds, pg.key.get_pressed()[pg.K_SPACE])
-            # refresh screen
-            pg.display.flip()
+            with profiler.phase("wait"):
+                draw: bool = not game_end and scheduler.should_draw()
+            if draw:
+                with profiler.phase("draw"):
+                    # draw the tiles that changed
+                    rects: list[pg.Rect] = renderer.draw(pg.key.get_pressed()[pg.K_SPACE])
+                    overlay: Optional[pg.Rect] = profiler.draw_overlay(screen)
+                    if overlay is not None:
+                        rects.append(overlay)
+                # refresh the changed areas of the screen
+                with profiler.phase("flip"):
+                    if rects:
+                        pg.display.update(rects)
+                profiler.end_frame()
     finally:
+        if recorder is not None:
+            recorder.close()
+        profiler.close()
         pg.quit()
 
 
 if __name__ == "__main__":
-    main()
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="A minimalist one-sided battleship game")
+    parser.add_argument("--fps", type=int, default=60, help="the maximum number of frames drawn per second (default: 60)")
+    parser.add_argument("--load", metavar="FILE", help="a board file to start from (see the S key)")
+    parser.add_argument("--save", metavar="FILE", default="battleship.bsb", help="the board file written when pressing S (default: battleship.bsb)")
+    parser.add_argument("--record", metavar="FILE", help="a replay log where to record the menu and the game (see replay.py)")
+    parser.add_argument("--profile", action="store_true", help=f"shows the time spent in each phase of the frames (also enabled by {ENABLE_VARIABLE}=1)")
+    parser.add_argument("--profile-output", metavar="FILE", help=f"a file where to write the timings of each frame, as CSV if it ends with .csv else as JSON lines (also set by {OUTPUT_VARIABLE}); implies --profile")
+    parser.add_argument("--seed", type=int, help="the seed of the random fleets placed with the R key (default: random)")
+    parser.add_argument("--bomb", type=int, default=1, metavar="SIDE", help="each click guesses a square of SIDE x SIDE tiles centred on the clicked tile (default: 1)")
+    args: argparse.Namespace = parser.parse_args()
+    main(args.fps, args.load, args.save, args.record, from_environment(args.profile, args.profile_output), args.seed, args.bomb)
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from classes import State, Tile, Board
+from simulation import STRATEGIES, Layout, Strategy, random_layout
+from typing import Any, Optional
+
+
+# Two-player protocol: one JSON object per line in both directions
+#
+# - client to server:
+#   - `{"type": "join", "size": [width, height], "boats": [[[x, y], ...], ...], "match": name}`: the board of the player; players joining with the same (optional) match name play against each other
+#   - `{"type": "guess", "pos": [x, y]}`: guesses a tile of the board of the opponent
+# - server to client:
+#   - `{"type": "start", "size": [width, height], "fleet": [length, ...], "turn": bool}`: the size of the board of the opponent and the length of each of its boats
+#   - `{"type": "reveal", "board": "opponent" | "own", "pos": [x, y], "hit": bool, "sunk": [[x, y], ...], "turn": bool}`: the result of a guess on the board of the opponent or on the board of the player. `sunk` is only there if the guess sunk a boat
+#   - `{"type": "end", "won": bool, "reason": "finished" | "disconnected"}`
+#   - `{"type": "error", "message": str}`
+#
+# `turn` tells whether the player may guess. Only what changed is ever sent: the boards themselves never go over the wire once joined
+
+MAX_SIZE: int = 1024
+"""The biggest width and height of the boards accepted by default"""
+LINE_LIMIT: int = 2 ** 24
+"""The biggest message in bytes, big enough for the join message of the biggest boards"""
+
+
+def encode(message: dict[str, Any]) -> bytes:
+    """Returns the given message as sent over the wire"""
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+async def receive(reader: asyncio.StreamReader) -> Optional[dict[str, Any]]:
+    """Returns the next message of the given stream, or `None` if the connection has been closed. Raises a `ValueError` if it is not a JSON object"""
+    line: bytes = await reader.readline()
+    if not line:
+        return None
+    message: Any = json.loads(line)
+    if not isinstance(message, dict):
+        raise ValueError("A message must be a JSON object")
+    return message
+
+
+def layout_message(layout: Layout, match: str = "") -> dict[str, Any]:
+    """Returns the join message of the given layout"""
+    return {"type": "join", "size": list(layout[0]), "boats": [[list(pos) for pos in tiles] for tiles in layout[1].values()], "match": match}
+
+
+def parse_layout(message: dict[str, Any], max_size: int = MAX_SIZE) -> Layout:
+    """Returns the layout of the given join message. Raises a `ValueError` if it is not a valid board: out of bounds or overlapping tiles, no boat or empty boats"""
+    try:
+        width, height = (int(value) for value in message["size"])
+        if not (0 < width <= max_size and 0 < height <= max_size):
+            raise ValueError(f"size {(width, height)} out of 1..{max_size}")
+        taken: set[tuple[int, int]] = set()
+        boats: dict[int, list[tuple[int, int]]] = {}
+        for boat_id, tiles in enumerate(message["boats"]):
+            boat: list[tuple[int, int]] = [(int(x), int(y)) for x, y in tiles]
+            if not boat:
+                raise ValueError(f"boat {boat_id} has no tile")
+            for x, y in boat:
+                if not (0 <= x < width and 0 <= y < height):
+                    raise ValueError(f"tile {(x, y)} out of the board")
+                if (x, y) in taken:
+                    raise ValueError(f"tile {(x, y)} used twice")
+                taken.add((x, y))
+            boats[boat_id] = boat
+        if not boats:
+            raise ValueError("no boat")
+    except (KeyError, TypeError, ValueError) as error:
+        raise ValueError(f"Invalid board: {error}") from None
+    return ((width, height), boats)
+
+
+class Player:
+    """A connected client, with its own board"""
+    def __init__(self, writer: asyncio.StreamWriter, layout: Layout) -> None:
+        self.writer: asyncio.StreamWriter = writer
+        self.board: Board = Board(layout[0], sparse=True)
+        """The board of the player, which its opponent guesses. Sparse to keep many matches in memory"""
+        for boat_id, tiles in layout[1].items():
+            for pos in tiles:
+                self.board.set_tile_at(Tile(boat_id, State.NOTSEEN), pos)
+        self.fleet: list[int] = [len(tiles) for tiles in layout[1].values()]
+        self.match: Optional[Match] = None
+
+    def send(self, message: dict[str, Any]) -> None:
+        """Sends the given message to the client, without waiting for it to be written (see `asyncio.StreamWriter.drain`)"""
+        if not self.writer.is_closing():
+            self.writer.write(encode(message))
+
+
+class Match:
+    """Two players guessing each other's board in turn"""
+    def __init__(self, first: Player, second: Player) -> None:
+        self.players: tuple[Player, Player] = (first, second)
+        self.turn: int = 0
+        """The index of the player who may guess"""
+        self.finished: bool = False
+        first.match = self
+        second.match = self
+        for index, player in enumerate(self.players):
+            opponent: Player = self.opponent(player)
+            player.send({"type": "start", "size": list(opponent.board.size()), "fleet": opponent.fleet, "turn": index == self.turn})
+
+    def opponent(self, player: Player) -> Player:
+        """Returns the other player of this match"""
+        return self.players[1] if player is self.players[0] else self.players[0]
+
+    def guess(self, player: Player, pos: tuple[int, int]) -> None:
+        """Guesses the tile at the given position of the board of the opponent of the given player and sends what changed to both players. Raises a `ValueError` if the player may not guess this tile"""
+        if self.finished:
+            raise ValueError("The match is over")
+        if self.players[self.turn] is not player:
+            raise ValueError("Not your turn")
+        opponent: Player = self.opponent(player)
+        board: Board = opponent.board
+        if not (0 <= pos[0] < board.size()[0] and 0 <= pos[1] < board.size()[1]):
+            raise ValueError(f"Tile {pos} out of the board")
+        boat_id: Optional[int] = board.boat_id_at(pos)
+        # a boat is only reported sunk by the guess that sunk it
+        afloat: bool = boat_id is not None and board.boats_view()[boat_id] == State.NOTSEEN
+        board.guess_tile(pos)
+        delta: dict[str, Any] = {"type": "reveal", "pos": list(pos), "hit": boat_id is not None}
+        if afloat and board.boats_view()[boat_id] == State.SEEN:
+            delta["sunk"] = [list(tile) for tile in sorted(board.get_boat_tiles(boat_id))]
+        self.finished = board.is_finished()
+        self.turn = 1 - self.turn
+        player.send({**delta, "board": "opponent", "turn": False})
+        opponent.send({**delta, "board": "own", "turn": not self.finished})
+        if self.finished:
+            player.send({"type": "end", "won": True, "reason": "finished"})
+            opponent.send({"type": "end", "won": False, "reason": "finished"})
+
+    def leave(self, player: Player) -> None:
+        """Ends this match because the given player left, which makes its opponent win"""
+        if not self.finished:
+            self.finished = True
+            self.opponent(player).send({"type": "end", "won": True, "reason": "disconnected"})
+
+
+class Server:
+    """Pairs the clients and plays their matches. A single server handles any number of concurrent matches"""
+    def __init__(self, max_size: int = MAX_SIZE) -> None:
+        self.max_size: int = max_size
+        """The biggest width and height of the boards accepted"""
+        self.__waiting: dict[str, Player] = {}
+        """The player waiting for an opponent for each match name"""
+        self.matches: int = 0
+        """The number of matches started"""
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.Server:
+        """Starts listening on the given address (any free port if 0) and returns the underlying server"""
+        return await asyncio.start_server(self.handle, host, port, limit=LINE_LIMIT)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serves a client until it disconnects"""
+        player: Optional[Player] = None
+        name: str = ""
+        try:
+            message: Optional[dict[str, Any]] = await receive(reader)
+            if message is None:
+                return
+            if message.get("type") != "join":
+                raise ValueError("Expected a join message")
+            player = Player(writer, parse_layout(message, self.max_size))
+            name = str(message.get("match", ""))
+            opponent: Optional[Player] = self.__waiting.pop(name, None)
+            if opponent is None or opponent.writer.is_closing():
+                self.__waiting[name] = player
+            else:
+                Match(opponent, player)
+                self.matches += 1
+            while (message := await receive(reader)) is not None:
+                try:
+                    if message.get("type") != "guess":
+                        raise ValueError(f"Unexpected message: {message.get('type')}")
+                    if player.match is None:
+                        raise ValueError("No opponent yet")
+                    x, y = message["pos"]
+                    player.match.guess(player, (int(x), int(y)))
+                except (KeyError, TypeError, ValueError) as error:
+                    player.send({"type": "error", "message": str(error)})
+                await writer.drain()
+        except (ValueError, ConnectionError) as error:
+            # invalid join message or broken connection
+            if not writer.is_closing():
+                writer.write(encode({"type": "error", "message": str(error)}))
+        finally:
+            if player is not None:
+                if self.__waiting.get(name) is player:
+                    del self.__waiting[name]
+                if player.match is not None:
+                    player.match.leave(player)
+            writer.close()
+
+
+async def play_client(host: str, port: int, layout: Layout, strategy: str, rng: random.Random, match: str = "", latencies: Optional[list[float]] = None) -> bool:
+    """Plays a match as a client whose guesses are chosen by a strategy and returns whether it has been won
+
+    Parameters
+    ----------
+
+    - host, port: the address of the server
+
+    - layout: the board of the client
+
+    - strategy: the name of the strategy choosing the guesses (see `simulation.STRATEGIES`)
+
+    - rng: the random generator of the strategy
+
+    - match: the name of the match to join
+
+    - latencies: where to add the time in seconds between each guess and its result"""
+    reader, writer = await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+    try:
+        writer.write(encode(layout_message(layout, match)))
+        guesser: Optional[Strategy] = None
+        sent: float = 0.0
+        while True:
+            message: Optional[dict[str, Any]] = await receive(reader)
+            if message is None:
+                raise ConnectionError("Connection closed by the server")
+            if message["type"] == "start":
+                guesser = STRATEGIES[strategy](tuple(message["size"]), rng, tuple(message["fleet"]))
+            elif message["type"] == "reveal" and message["board"] == "opponent":
+                if latencies is not None:
+                    latencies.append(time.perf_counter() - sent)
+                sunk: Optional[set[tuple[int, int]]] = {tuple(pos) for pos in message["sunk"]} if "sunk" in message else None
+                guesser.observe(tuple(message["pos"]), message["hit"], sunk)
+            elif message["type"] == "end":
+                return message["won"]
+            elif message["type"] == "error":
+                raise RuntimeError(message["message"])
+            if message.get("turn"):
+                sent = time.perf_counter()
+                writer.write(encode({"type": "guess", "pos": list(guesser.next_guess())}))
+                await writer.drain()
+    finally:
+        writer.close()
+
+
+class LoadReport:
+    """The results of a load test"""
+    def __init__(self, matches: int, latencies: list[float], elapsed: float) -> None:
+        self.matches: int = matches
+        """The number of matches played"""
+        self.latencies: list[float] = latencies
+        """The round-trip time in seconds of each guess"""
+        self.elapsed: float = elapsed
+        """The time in seconds it took to play all the matches"""
+
+    def __repr__(self) -> str:
+        return "\n".join([
+            f"matches: {self.matches} in {self.elapsed:.3f} s ({self.matches_per_second():.1f} matches/s)",
+            f"guesses: {len(self.latencies)} ({len(self.latencies) / self.elapsed if self.elapsed > 0 else float('inf'):.0f} guesses/s), mean latency {statistics.fmean(self.latencies) * 1000:.3f} ms",
+            "latency percentiles: " + ", ".join([f"p{p} {v * 1000:.3f} ms" for p, v in self.percentiles().items()]),
+        ])
+
+    def matches_per_second(self) -> float:
+        """Returns the number of matches played per second"""
+        return self.matches / self.elapsed if self.elapsed > 0 else float("inf")
+
+    def percentiles(self, points: tuple[int, ...] = (50, 90, 99, 100)) -> dict[int, float]:
+        """Returns the round-trip time in seconds under which the given percentages of the guesses got their result"""
+        ordered: list[float] = sorted(self.latencies)
+        return {p: ordered[min(len(ordered) - 1, len(ordered) * p // 100)] for p in points}
+
+
+async def load_test(host: str, port: int, matches: int, concurrency: int = 100, size: tuple[int, int] = (10, 10), fleet: tuple[int, ...] = (5, 4, 3, 3, 2), strategy: str = "parity", seed: int = 0) -> LoadReport:
+    """Plays matches between pairs of strategy-driven clients against a server and measures it
+
+    Parameters
+    ----------
+
+    - host, port: the address of the server
+
+    - matches: the number of matches to play
+
+    - concurrency: the number of matches played at the same time
+
+    - size: the width and the height of the boards
+
+    - fleet: the length of each boat
+
+    - strategy: the name of the strategy of all the clients (see `simulation.STRATEGIES`)
+
+    - seed: the seed of the first match, the following matches using the next ones"""
+    latencies: list[float] = []
+    slots: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+
+    async def play_match(index: int) -> None:
+        async with slots:
+            rngs: list[random.Random] = [random.Random(f"{seed + index}-{player}") for player in range(2)]
+            name: str = f"load-{seed}-{index}"
+            await asyncio.gather(*[play_client(host, port, random_layout(size, fleet, rng), strategy, rng, name, latencies) for rng in rngs])
+
+    start_time: float = time.perf_counter()
+    await asyncio.gather(*[play_match(index) for index in range(matches)])
+    return LoadReport(matches, latencies, time.perf_counter() - start_time)
+
+
+async def serve(host: str, port: int, max_size: int = MAX_SIZE) -> None:
+    """Runs a server on the given address until cancelled"""
+    server: asyncio.Server = await Server(max_size).start(host, port)
+    async with server:
+        await server.serve_forever()
+
+
+async def local_load_test(**options: Any) -> LoadReport:
+    """Runs a load test against a server started in this process on a free loopback port (see `load_test`)"""
+    server: asyncio.Server = await Server().start("127.0.0.1", 0)
+    async with server:
+        return await load_test("127.0.0.1", server.sockets[0].getsockname()[1], **options)
+
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Two-player battleship over the network")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser: argparse.ArgumentParser = commands.add_parser("serve", help="runs a server")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="the address to listen on (default: 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=8765, help="the port to listen on (default: 8765)")
+    serve_parser.add_argument("--max-size", type=int, default=MAX_SIZE, help=f"the biggest width and height of the boards (default: {MAX_SIZE})")
+    load_parser: argparse.ArgumentParser = commands.add_parser("load", help="plays matches between generated clients and reports the latency of the guesses")
+    load_parser.add_argument("--host", default="127.0.0.1", help="the address of the server (default: 127.0.0.1)")
+    load_parser.add_argument("--port", type=int, help="the port of the server. If none, a server is started in this process")
+    load_parser.add_argument("--matches", type=int, default=1000, help="the number of matches to play (default: 1000)")
+    load_parser.add_argument("--concurrency", type=int, default=100, help="the number of matches played at the same time (default: 100)")
+    load_parser.add_argument("--size", type=int, nargs=2, default=(10, 10), metavar=("WIDTH", "HEIGHT"), help="the size of the boards (default: 10 10)")
+    load_parser.add_argument("--fleet", type=int, nargs="+", default=(5, 4, 3, 3, 2), metavar="LENGTH", help="the length of each boat (default: 5 4 3 3 2)")
+    load_parser.add_argument("--strategy", choices=list(STRATEGIES), default="parity", help="the guessing strategy of the clients (default: parity)")
+    load_parser.add_argument("--seed", type=int, default=0, help="the seed of the first match (default: 0)")
+    args: argparse.Namespace = parser.parse_args()
+    if args.command == "serve":
+        asyncio.run(serve(args.host, args.port, args.max_size))
+    else:
+        options: dict[str, Any] = {"matches": args.matches, "concurrency": args.concurrency, "size": tuple(args.size), "fleet": tuple(args.fleet), "strategy": args.strategy, "seed": args.seed}
+        if args.port is None:
+            print(asyncio.run(local_load_test(**options)))
+        else:
+            print(asyncio.run(load_test(args.host, args.port, **options)))
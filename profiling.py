@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+from __future__ import annotations
+import csv
+import json
+import os
+import time
+
+import pygame as pg
+
+from collections import deque
+from contextlib import nullcontext
+from typing import Any, Optional, TextIO
+
+
+PHASES: tuple[str, ...] = ("wait", "events", "board", "draw", "flip")
+"""The parts of a frame that are timed: waiting for events or for the next frame, handling the events, changing the board, drawing and updating the screen"""
+ENABLE_VARIABLE: str = "BATTLESHIP_PROFILE"
+"""The environment variable enabling the profiler when set to anything but 0"""
+OUTPUT_VARIABLE: str = "BATTLESHIP_PROFILE_OUTPUT"
+"""The environment variable giving the file where to write the record of each frame"""
+NO_PHASE: nullcontext = nullcontext()
+"""What a disabled profiler times phases with"""
+
+
+class Phase:
+    """Times a phase of the current frame. The time spent in nested phases is only counted in them"""
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: Profiler, name: str) -> None:
+        self.profiler: Profiler = profiler
+        self.name: str = name
+        self.start: float = 0.0
+
+    def __enter__(self) -> None:
+        self.profiler.nested.append(0.0)
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exception) -> None:
+        elapsed: float = time.perf_counter() - self.start
+        self.profiler.times[self.name] += elapsed - self.profiler.nested.pop()
+        if self.profiler.nested:
+            self.profiler.nested[-1] += elapsed
+
+
+class Profiler:
+    """Times the phases of each frame (see `PHASES`), shows them in an overlay and writes them to a file. A disabled profiler does nothing"""
+    def __init__(self, enabled: bool = True, output: Optional[str] = None, window: int = 60) -> None:
+        """Inits a profiler
+
+        Parameters
+        ----------
+
+        - enabled: whether anything is timed
+
+        - output: the path of a file where to write the record of each frame: CSV if it ends with `.csv`, else one JSON object per line
+
+        - window: the number of frames the overlay averages over"""
+        self.enabled: bool = enabled
+        self.times: dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        """The time in seconds spent in each phase since the last frame"""
+        self.nested: list[float] = []
+        """For each phase being timed, the time in seconds spent in the phases nested in it"""
+        self.frames: int = 0
+        """The number of frames ended"""
+        self.__start: float = time.perf_counter()
+        self.__last: float = self.__start
+        """When the last frame ended"""
+        self.__window: deque[dict[str, float]] = deque(maxlen=window)
+        """The records of the last frames"""
+        self.__file: Optional[TextIO] = None
+        self.__csv: Optional[csv.DictWriter] = None
+        if enabled and output is not None:
+            self.__file = open(output, "w", newline="")
+            if output.endswith(".csv"):
+                self.__csv = csv.DictWriter(self.__file, ["frame", "time", "frame_ms"] + [f"{name}_ms" for name in PHASES])
+                self.__csv.writeheader()
+        self.__font: Optional[pg.font.Font] = None
+        self.__overlay: pg.Rect = pg.Rect(0, 0, 0, 0)
+        """The area of the screen used by the overlay so far"""
+
+    def phase(self, name: str) -> Phase | nullcontext:
+        """Returns a context manager timing the given phase of the current frame (see `PHASES`)"""
+        if not self.enabled:
+            return NO_PHASE
+        return Phase(self, name)
+
+    def end_frame(self) -> None:
+        """Ends the current frame: its record is written and added to the overlay"""
+        if not self.enabled:
+            return
+        now: float = time.perf_counter()
+        record: dict[str, Any] = {"frame": self.frames, "time": round(now - self.__start, 6), "frame_ms": (now - self.__last) * 1000}
+        for name in PHASES:
+            record[f"{name}_ms"] = self.times[name] * 1000
+            self.times[name] = 0.0
+        self.__window.append(record)
+        if self.__csv is not None:
+            self.__csv.writerow(record)
+        elif self.__file is not None:
+            self.__file.write(json.dumps(record) + "\n")
+        self.frames += 1
+        self.__last = now
+
+    def summary(self) -> dict[str, float]:
+        """Returns the frames per second and the mean time in milliseconds of the frames and of their phases over the last frames"""
+        if not self.__window:
+            return {}
+        frame_ms: float = sum(record["frame_ms"] for record in self.__window) / len(self.__window)
+        summary: dict[str, float] = {"fps": 1000 / frame_ms if frame_ms > 0 else float("inf"), "frame_ms": frame_ms}
+        for name in PHASES:
+            summary[f"{name}_ms"] = sum(record[f"{name}_ms"] for record in self.__window) / len(self.__window)
+        return summary
+
+    def draw_overlay(self, screen: pg.Surface) -> Optional[pg.Rect]:
+        """Draws the summary of the last frames in the top left corner of the given screen and returns the area to update, if enabled"""
+        if not self.enabled:
+            return None
+        if self.__font is None:
+            self.__font = pg.font.Font(None, 20)
+        summary: dict[str, float] = self.summary()
+        lines: list[str] = [
+            f"{summary.get('fps', 0):.1f} fps, {summary.get('frame_ms', 0):.2f} ms/frame",
+            "  ".join([f"{name} {summary.get(f'{name}_ms', 0):.2f}" for name in PHASES]),
+        ]
+        texts: list[pg.Surface] = [self.__font.render(line, True, (255, 255, 255)) for line in lines]
+        # the overlay never shrinks so that it always covers the previous one
+        self.__overlay.size = (
+            max(self.__overlay.width, max(text.get_width() for text in texts) + 8),
+            max(self.__overlay.height, sum(text.get_height() for text in texts) + 8)
+        )
+        screen.fill((0, 0, 0), self.__overlay)
+        y: int = 4
+        for text in texts:
+            screen.blit(text, (4, y))
+            y += text.get_height()
+        return self.__overlay.copy()
+
+    def close(self) -> None:
+        """Writes the pending records and closes the output file"""
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
+def from_environment(enabled: bool = False, output: Optional[str] = None) -> Profiler:
+    """Returns a profiler enabled by the given options or by the environment variables (see `ENABLE_VARIABLE` and `OUTPUT_VARIABLE`). Giving an output file enables it"""
+    output = output or os.environ.get(OUTPUT_VARIABLE) or None
+    enabled = enabled or output is not None or os.environ.get(ENABLE_VARIABLE, "0") not in ("", "0")
+    return Profiler(enabled, output)
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+from __future__ import annotations
+import argparse
+import mmap
+import struct
+
+from bisect import bisect_right
+from boardfile import dumps_board, loads_board
+from classes import NO_BOAT, State, Tile, Board
+from typing import BinaryIO, Iterator, Optional
+
+
+# Replay log, all values being little-endian:
+#
+# - header (`LOG_HEADER`): magic and version
+# - records, one after another, each starting with its event code (see `EVENTS`):
+#   - `set_tile_at`: the position, the boat id (`NO_BOAT` if none) and whether the tile has been seen
+#   - `del_boat`: the boat id
+#   - `add_row`, `del_row`, `add_column`, `del_column`: nothing
+#   - `guess_tile`: the position
+#   - `place_boat`: the start and the end positions and the id of the new boat, the removal of the boats it overlaps being
+#     recorded before
+#   - snapshot: the size in bytes of the board that follows, in the board file format (see `boardfile.save_board`)
+#   - attached snapshot: the same as a snapshot, for a board that replaces the recorded one (see `Recorder.attach`)
+#
+# A log always starts with a snapshot of the board, so that it can be replayed from any board. A snapshot always
+# holds the board as it is at this point of the log, even if the recorded board has been replaced.
+# The records are only appended: a log can be read while it is written, an incomplete last record being ignored
+
+LOG_MAGIC: bytes = b"BSRL"
+"""The first bytes of a replay log"""
+LOG_VERSION: int = 3
+"""The version of the format written by `Recorder`"""
+LOG_HEADER: struct.Struct = struct.Struct("<4sH2x")
+SNAPSHOT: int = 0
+"""The event code of the snapshots"""
+ATTACHED: int = 9
+"""The event code of the snapshots of attached boards (see `Recorder.attach`)"""
+SNAPSHOT_RECORD: struct.Struct = struct.Struct("<BQ")
+EVENTS: dict[str, tuple[int, struct.Struct]] = {
+    "set_tile_at": (1, struct.Struct("<BiiqB")),
+    "del_boat": (2, struct.Struct("<Bq")),
+    "add_row": (3, struct.Struct("<B")),
+    "del_row": (4, struct.Struct("<B")),
+    "add_column": (5, struct.Struct("<B")),
+    "del_column": (6, struct.Struct("<B")),
+    "guess_tile": (7, struct.Struct("<Bii")),
+    "place_boat": (8, struct.Struct("<Biiiiq")),
+}
+"""The event code and the record of each change of a board (see `Board.set_recorder`)"""
+EVENT_NAMES: dict[int, tuple[str, struct.Struct]] = {code: (name, record) for name, (code, record) in EVENTS.items()}
+"""The name and the record of each event code"""
+MIN_INTERVAL: int = 256
+"""The smallest number of events between two snapshots"""
+
+
+def default_interval(board: Board) -> int:
+    """Returns the number of events between two snapshots of the given board such that taking the snapshots costs about as much as replaying the events: bigger boards have fewer snapshots"""
+    return max(MIN_INTERVAL, board.size()[0] * board.size()[1] // 64)
+
+
+class Recorder:
+    """Appends each change of a board to a replay log, with a snapshot of the whole board every now and then"""
+    def __init__(self, board: Board, path: str, interval: Optional[int] = None) -> None:
+        """Starts recording the given board into a new log (see `Board.set_recorder`)
+
+        Parameters
+        ----------
+
+        - board: the board to record. Its boat ids must be non-negative
+
+        - path: the path of the log, replaced if it exists
+
+        - interval: the number of events between two snapshots. If none, it depends on the size of the board (see `default_interval`)"""
+        self.__board: Board = board
+        self.__interval: Optional[int] = interval
+        self.__file: BinaryIO = open(path, "wb", buffering=1 << 16)
+        self.__file.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION))
+        self.__since: int = 0
+        """The number of events since the last snapshot"""
+        self.events: int = 0
+        """The number of events recorded"""
+        self.snapshot()
+        board.set_recorder(self)
+
+    def __call__(self, name: str, *args) -> None:
+        """Appends the given change of the board (see `Board.set_recorder`)"""
+        code, record = EVENTS[name]
+        if name == "set_tile_at":
+            pos, boat_id, state = args
+            self.__file.write(record.pack(code, pos[0], pos[1], NO_BOAT if boat_id is None else boat_id, state.value))
+        elif name == "guess_tile":
+            self.__file.write(record.pack(code, args[0][0], args[0][1]))
+        elif name == "place_boat":
+            self.__file.write(record.pack(code, args[0][0], args[0][1], args[1][0], args[1][1], args[2]))
+        else:
+            self.__file.write(record.pack(code, *args))
+        self.events += 1
+        self.__since += 1
+        if self.__since >= (self.__interval or default_interval(self.__board)):
+            self.snapshot()
+
+    def __enter__(self) -> Recorder:
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.close()
+
+    def snapshot(self) -> None:
+        """Appends the whole board, from which the following events can be replayed"""
+        self.__append_board(SNAPSHOT)
+
+    def __append_board(self, code: int) -> None:
+        """Appends the whole board in a snapshot record of the given code"""
+        data: bytes = dumps_board(self.__board)
+        self.__file.write(SNAPSHOT_RECORD.pack(code, len(data)))
+        self.__file.write(data)
+        self.__since = 0
+
+    def attach(self, board: Board) -> None:
+        """Records another board from now on, e.g. a board restored by an undo. A snapshot of it is appended so that the log follows, marked so that playing the log replaces the board (see `Replay.play`)"""
+        self.__board.set_recorder(None)
+        self.__board = board
+        self.__append_board(ATTACHED)
+        board.set_recorder(self)
+
+    def flush(self) -> None:
+        """Writes the buffered records to the log, e.g. so that it can be read while it is recorded"""
+        self.__file.flush()
+
+    def close(self) -> None:
+        """Stops recording and closes the log"""
+        if not self.__file.closed:
+            self.__board.set_recorder(None)
+            self.__file.close()
+
+
+class Replay:
+    """A replay log opened for playback. Seeking only replays the events following the closest snapshot"""
+    def __init__(self, path: str) -> None:
+        """Opens the log at the given path and indexes its snapshots. Raises a `ValueError` if it is not a replay log"""
+        with open(path, "rb") as file:
+            self.__data: mmap.mmap | bytes = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if file.seek(0, 2) > 0 else b""
+        if len(self.__data) < LOG_HEADER.size or LOG_HEADER.unpack_from(self.__data)[0] != LOG_MAGIC:
+            raise ValueError("Not a replay log")
+        version: int = LOG_HEADER.unpack_from(self.__data)[1]
+        if version != LOG_VERSION:
+            raise ValueError(f"Unsupported replay log version: {version}; supported: {LOG_VERSION}")
+        self.__snapshots: list[tuple[int, int, int]] = []
+        """The number of events and of guesses before each snapshot, and the position of its record"""
+        self.__snapshot_moves: list[int] = []
+        """The number of guesses before each snapshot, to search them by guess"""
+        self.events: int = 0
+        """The number of events of the log"""
+        self.moves: int = 0
+        """The number of guesses of the log"""
+        for offset, name, args in self.__records(LOG_HEADER.size):
+            if name is None:
+                self.__snapshots.append((self.events, self.moves, offset))
+                self.__snapshot_moves.append(self.moves)
+            else:
+                self.events += 1
+                self.moves += name == "guess_tile"
+        if not self.__snapshots:
+            raise ValueError("Replay log without any snapshot")
+
+    def __enter__(self) -> Replay:
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the log"""
+        if isinstance(self.__data, mmap.mmap):
+            self.__data.close()
+
+    def __records(self, offset: int) -> Iterator[tuple[int, Optional[str], tuple]]:
+        """Yields the position, the event name (`None` for snapshots) and the arguments of each record from the given position on. The arguments of a snapshot are the position and the size of its board and whether it is the snapshot of an attached board"""
+        data = self.__data
+        while offset < len(data):
+            code: int = data[offset]
+            if code in (SNAPSHOT, ATTACHED):
+                if offset + SNAPSHOT_RECORD.size > len(data):
+                    return
+                length: int = SNAPSHOT_RECORD.unpack_from(data, offset)[1]
+                if offset + SNAPSHOT_RECORD.size + length > len(data):
+                    return
+                yield (offset, None, (offset + SNAPSHOT_RECORD.size, length, code == ATTACHED))
+                offset += SNAPSHOT_RECORD.size + length
+            else:
+                if code not in EVENT_NAMES:
+                    raise ValueError(f"Invalid event code {code} at byte {offset}")
+                name, record = EVENT_NAMES[code]
+                if offset + record.size > len(data):
+                    return
+                yield (offset, name, record.unpack_from(data, offset)[1:])
+                offset += record.size
+
+    def __board_from(self, snapshot: tuple[int, int, int]) -> tuple[Board, Iterator[tuple[int, Optional[str], tuple]]]:
+        """Returns the board of the given snapshot and the records following it"""
+        records: Iterator[tuple[int, Optional[str], tuple]] = self.__records(snapshot[2])
+        return (self.__snapshot_board(next(records)[2]), records)
+
+    def __snapshot_board(self, args: tuple[int, int, bool]) -> Board:
+        """Returns the board of the snapshot of the given arguments (see `__records`)"""
+        start, length = args[:2]
+        return loads_board(self.__data[start:start + length])
+
+    @staticmethod
+    def apply(board: Board, name: str, args: tuple) -> Board:
+        """Changes the given board as the given event did and returns it, or returns the attached board for the `attach` events (see `play`)"""
+        if name == "attach":
+            return args[0]
+        if name == "set_tile_at":
+            x, y, boat_id, seen = args
+            board.set_tile_at(Tile(None if boat_id == NO_BOAT else boat_id, State(bool(seen))), (x, y))
+        elif name == "guess_tile":
+            board.guess_tile(args)
+        elif name == "place_boat":
+            board.place_boat(args[:2], args[2:4], args[4])
+        else:
+            getattr(board, name)(*args)
+        return board
+
+    def board_at(self, event: int) -> Board:
+        """Returns a new board as it was after the given number of events"""
+        if not 0 <= event <= self.events:
+            raise IndexError(f"Max value: {self.events}; given: {event}")
+        snapshot: tuple[int, int, int] = self.__snapshots[bisect_right(self.__snapshots, (event, float("inf"))) - 1]
+        board, records = self.__board_from(snapshot)
+        count: int = snapshot[0]
+        for offset, name, args in records:
+            if count == event:
+                break
+            if name is not None:
+                self.apply(board, name, args)
+                count += 1
+        return board
+
+    def board_after(self, moves: int) -> Board:
+        """Returns a new board as it was after the given number of guesses, i.e. just before the following guess"""
+        if not 0 <= moves <= self.moves:
+            raise IndexError(f"Max value: {self.moves}; given: {moves}")
+        snapshot: tuple[int, int, int] = self.__snapshots[bisect_right(self.__snapshot_moves, moves) - 1]
+        board, records = self.__board_from(snapshot)
+        count: int = snapshot[1]
+        for offset, name, args in records:
+            if name == "guess_tile":
+                if count == moves:
+                    break
+                count += 1
+            if name is not None:
+                self.apply(board, name, args)
+        return board
+
+    def play(self, start: int = 0) -> Iterator[tuple[str, tuple]]:
+        """Yields the name and the arguments of each event from the given one on, to be applied to `board_at(start)` (see `apply`). When another board was recorded from then on (see `Recorder.attach`), `("attach", (board,))` is yielded with a new board as it was attached: the following events change this board"""
+        snapshot: tuple[int, int, int] = self.__snapshots[bisect_right(self.__snapshots, (start, float("inf"))) - 1]
+        records: Iterator[tuple[int, Optional[str], tuple]] = self.__records(snapshot[2])
+        # the board of the first snapshot is `board_at(start)`
+        next(records)
+        count: int = snapshot[0]
+        for offset, name, args in records:
+            if name is None:
+                if args[2] and count >= start:
+                    yield ("attach", (self.__snapshot_board(args),))
+            else:
+                if count >= start:
+                    yield (name, args)
+                count += 1
+
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Shows a board of a replay log (see the --record option of main.py)")
+    parser.add_argument("log", help="the replay log")
+    parser.add_argument("--move", type=int, help="the number of guesses after which the board is shown (default: all of them)")
+    parser.add_argument("--event", type=int, help="the number of events after which the board is shown, instead of a number of guesses")
+    args: argparse.Namespace = parser.parse_args()
+    with Replay(args.log) as replay:
+        print(f"events: {replay.events}, guesses: {replay.moves}")
+        print(replay.board_at(args.event) if args.event is not None else replay.board_after(replay.moves if args.move is None else args.move))
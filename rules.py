@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+from __future__ import annotations
+import random
+
+from classes import State, Board, Salvo
+from collections import deque
+from fleet import FLEET, Placement, random_fleet
+from typing import Mapping, Optional
+
+
+# The rules and the bookkeeping shared by every frontend (see `main.py` and `terminal.py`), which must not depend on any of them
+
+UNDO_LIMIT: int = 1000
+"""The number of changes of the board that can be undone in the menu"""
+
+
+class History:
+    """The boards before each change made in the menu, to undo the changes and to redo them. The boards are kept as snapshots, which cost nothing until the board changes (see `Board.snapshot`)"""
+    def __init__(self, limit: int = UNDO_LIMIT) -> None:
+        self.__past: deque[Board] = deque(maxlen=limit)
+        """The boards before each change, the last one first undone"""
+        self.__future: list[Board] = []
+        """The boards undone, the last one first redone"""
+
+    def checkpoint(self, board: Board) -> None:
+        """Keeps the given board as it is before it is changed, so that the change can be undone. The changes undone cannot be redone anymore"""
+        self.__past.append(board.snapshot())
+        self.__future.clear()
+
+    def undo(self, board: Board) -> Optional[Board]:
+        """Returns the board before the last change of the given board, which is kept to be redone, or `None` if there is nothing to undo"""
+        if not self.__past:
+            return None
+        self.__future.append(board)
+        return self.__past.pop()
+
+    def redo(self, board: Board) -> Optional[Board]:
+        """Returns the board after the last change undone, the given board being kept to be undone, or `None` if there is nothing to redo"""
+        if not self.__future:
+            return None
+        self.__past.append(board)
+        return self.__future.pop()
+
+
+class BoardChanges:
+    """The tiles of a board that changed since the last frame of a frontend, so that only these are drawn again (see `main.BoardRenderer` and `terminal.TerminalView`)"""
+    def __init__(self, board: Board) -> None:
+        """Inits the changes of the given board. Its first frame draws everything"""
+        self.__board: Board = board
+        self.__dirty: set[tuple[int, int]] = set()
+        """The positions of the tiles to draw again"""
+        self.__full: bool = True
+        """Whether the next frame draws everything"""
+        self.__super: Optional[bool] = None
+        """The value of `super` used for the last frame"""
+        self.__fleet: set[int] = set()
+        """The boat ids of the last frame"""
+
+    def board(self) -> Board:
+        """Returns the board drawn"""
+        return self.__board
+
+    def set_board(self, board: Board) -> None:
+        """Draws another board from the next frame on, e.g. after a change was undone"""
+        self.__board = board
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Makes the next frame draw everything, e.g. after the size of the board or the display settings changed"""
+        self.__full = True
+
+    def mark_tile(self, pos: tuple[int, int]) -> None:
+        """Makes the next frame draw the tile at the given position (under the form `(x, y)`) again"""
+        self.__dirty.add(pos)
+
+    def mark_guess(self, pos: tuple[int, int]) -> None:
+        """Makes the next frame draw what the guess of the tile at the given position (under the form `(x, y)`) changed, i.e. this tile and the whole boat if it has been sunk"""
+        self.__dirty.add(pos)
+        boat_id: Optional[int] = self.__board.boat_id_at(pos)
+        if boat_id is not None and self.__board.boats_view()[boat_id] == State.SEEN:
+            self.__dirty.update(self.__board.get_boat_tiles(boat_id))
+
+    def mark_salvo(self, salvo: Salvo) -> None:
+        """Makes the next frame draw what the given guesses changed, i.e. the revealed tiles and the whole boats sunk"""
+        self.__dirty.update(salvo.revealed)
+        for boat_id in salvo.sunk:
+            self.__dirty.update(self.__board.get_boat_tiles(boat_id))
+
+    def next_frame(self, super: bool) -> tuple[bool, Optional[set[tuple[int, int]]]]:
+        """Starts a frame and returns whether the boat ids changed since the last one, in which case the colours of the boats, which depend on the whole fleet, have to be computed again, and the tiles to draw again, or `None` if everything has to be drawn again
+
+        Parameters
+        ----------
+
+        - super: whether all tiles are displayed (see `main.draw_board`). Changing it draws everything again"""
+        boats: Mapping[int, State] = self.__board.boats_view()
+        fleet_changed: bool = boats.keys() != self.__fleet
+        if fleet_changed:
+            self.__fleet = set(boats.keys())
+            self.__full = True
+        if super != self.__super:
+            self.__super = super
+            self.__full = True
+        dirty: set[tuple[int, int]] = self.__dirty
+        self.__dirty = set()
+        if self.__full:
+            self.__full = False
+            return (fleet_changed, None)
+        return (fleet_changed, dirty)
+
+
+def can_start(board: Board) -> bool:
+    """Returns whether the game can start with the given board, i.e. whether at least one boat has been placed"""
+    return len(board.boats_view()) > 0
+
+
+def replace_fleet(board: Board, rng: random.Random, history: Optional[History] = None, fleet: tuple[int, ...] = FLEET) -> bool:
+    """Replaces the boats of the given board with boats of the given lengths placed randomly (see `fleet.random_fleet`). Returns whether the board changed, which it does not if the fleet does not fit in it
+    
+    Parameters
+    ----------
+    
+    - board: the board to change
+    
+    - rng: the random generator used to place the boats
+    
+    - history: where to keep the board before it changes, if any (see `History.checkpoint`)
+    
+    - fleet: the length of each boat"""
+    try:
+        placements: list[Placement] = random_fleet(board.size(), fleet, rng)
+    except ValueError:
+        return False
+    if history is not None:
+        history.checkpoint(board)
+    for boat_id in list(board.boats_view()):
+        board.del_boat(boat_id)
+    for start, end in placements:
+        board.place_boat(start, end)
+    return True
+
+
+def bomb_area(pos: tuple[int, int], side: int) -> tuple[int, int, int, int]:
+    """Returns the square of tiles of the given side centred on the given tile (under the form `(x, y)`) guessed by a bomb, under the form `(x, y, width, height)` (see `Board.guess_area`)"""
+    return (pos[0] - (side - 1) // 2, pos[1] - (side - 1) // 2, side, side)
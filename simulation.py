@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+from __future__ import annotations
+import argparse
+import os
+import random
+import statistics
+import time
+
+from classes import State, Tile, Board
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from fleet import random_fleet
+from math import ceil
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+Layout = tuple[tuple[int, int], dict[int, list[tuple[int, int]]]]
+"""A board's size and the positions of the tiles of each of its boats. Unlike a board, it is light to send to other processes"""
+
+
+def board_layout(board: Board) -> Layout:
+    """Returns the layout of the given board"""
+    return (board.size(), {boat_id: sorted(board.get_boat_tiles(boat_id)) for boat_id in board.get_boats()})
+
+
+def layout_board(layout: Layout) -> Board:
+    """Returns a new board where none of the boats of the given layout has been seen"""
+    board: Board = Board(layout[0])
+    for boat_id, tiles in layout[1].items():
+        for pos in tiles:
+            board.set_tile_at(Tile(boat_id, State.NOTSEEN), pos)
+    return board
+
+
+def random_layout(size: tuple[int, int], fleet: tuple[int, ...], rng: random.Random) -> Layout:
+    """Returns a layout of the given size where the boats of the given lengths are placed randomly, horizontally or vertically, without overlapping
+
+    Parameters
+    ----------
+
+    - size: the width and the height of the board
+
+    - fleet: the length of each boat
+
+    - rng: the random generator used to place the boats (see `fleet.random_fleet`)"""
+    return (size, {boat_id: [(x, y) for x in range(start[0], end[0] + 1) for y in range(start[1], end[1] + 1)] for boat_id, (start, end) in enumerate(random_fleet(size, fleet, rng))})
+
+
+class Strategy:
+    """A way of guessing tiles. A strategy only knows the results of its own guesses, never the content of the board"""
+    def __init__(self, size: tuple[int, int], rng: random.Random, fleet: tuple[int, ...]) -> None:
+        """Inits a strategy for a new game
+
+        Parameters
+        ----------
+
+        - size: the width and the height of the board to guess
+
+        - rng: the random generator to use for any random choice
+
+        - fleet: the length of each boat to find, which is known by the players"""
+        self.size: tuple[int, int] = size
+        self.rng: random.Random = rng
+        self.fleet: tuple[int, ...] = fleet
+        self.guessed: set[tuple[int, int]] = set()
+        """The tiles that have already been guessed"""
+
+    @classmethod
+    def from_board(cls, board: Board, rng: random.Random) -> Strategy:
+        """Returns a strategy which knows what the opponent can see of the given board: the results of the guesses already made and the length of each boat"""
+        strategy: Strategy = cls(board.size(), rng, tuple(len(board.get_boat_tiles(boat_id)) for boat_id in board.get_boats()))
+        for pos, boat_id, state in board.iter_cells():
+            if state == State.SEEN:
+                strategy.observe(pos, boat_id is not None, None)
+        for boat_id, state in board.boats_view().items():
+            tiles: set[tuple[int, int]] = board.get_boat_tiles(boat_id)
+            if state == State.SEEN and tiles:
+                strategy.observe(min(tiles), True, tiles)
+        return strategy
+
+    def next_guess(self) -> tuple[int, int]:
+        """Returns the position (under the form `(x, y)`) of the next tile to guess"""
+        raise NotImplementedError
+
+    def observe(self, pos: tuple[int, int], hit: bool, sunk: Optional[set[tuple[int, int]]]) -> None:
+        """Learns the result of the guess of the tile at the given position
+
+        Parameters
+        ----------
+
+        - pos: the position of the guessed tile
+
+        - hit: whether the guessed tile contains a boat
+
+        - sunk: the positions of the tiles of the boat this guess has sunk, if any"""
+        self.guessed.add(pos)
+
+
+class RandomStrategy(Strategy):
+    """Guesses every tile once, in a random order"""
+    def __init__(self, size: tuple[int, int], rng: random.Random, fleet: tuple[int, ...]) -> None:
+        super().__init__(size, rng, fleet)
+        self.__order: list[tuple[int, int]] = [(x, y) for y in range(size[1]) for x in range(size[0])]
+        rng.shuffle(self.__order)
+
+    def next_guess(self) -> tuple[int, int]:
+        return self.__order.pop()
+
+
+class HuntTargetStrategy(Strategy):
+    """Guesses random tiles (hunt) until it hits a boat, then guesses the neighbours of the hits (target) until the hit boats are sunk"""
+    def __init__(self, size: tuple[int, int], rng: random.Random, fleet: tuple[int, ...]) -> None:
+        super().__init__(size, rng, fleet)
+        self.__order: list[tuple[int, int]] = [(x, y) for y in range(size[1]) for x in range(size[0]) if self.is_hunted((x, y))]
+        rng.shuffle(self.__order)
+        self.__rest: list[tuple[int, int]] = [(x, y) for y in range(size[1]) for x in range(size[0]) if not self.is_hunted((x, y))]
+        """The tiles to guess once all the hunted ones have been guessed"""
+        rng.shuffle(self.__rest)
+        self.__targets: list[tuple[int, int]] = []
+        self.__hits: set[tuple[int, int]] = set()
+        """The hits that belong to boats not sunk yet"""
+
+    def is_hunted(self, pos: tuple[int, int]) -> bool:
+        """Returns whether the given tile is worth guessing while hunting"""
+        return True
+
+    def next_guess(self) -> tuple[int, int]:
+        for tiles in (self.__targets, self.__order, self.__rest):
+            while tiles:
+                pos: tuple[int, int] = tiles.pop()
+                if pos not in self.guessed:
+                    return pos
+        raise IndexError("Every tile has already been guessed")
+
+    def observe(self, pos: tuple[int, int], hit: bool, sunk: Optional[set[tuple[int, int]]]) -> None:
+        super().observe(pos, hit, sunk)
+        if not hit:
+            return
+        self.__hits.add(pos)
+        if sunk is not None:
+            self.__hits -= sunk
+            if not self.__hits:
+                self.__targets.clear()
+                return
+        x, y = pos
+        for neighbour in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if 0 <= neighbour[0] < self.size[0] and 0 <= neighbour[1] < self.size[1] and neighbour not in self.guessed:
+                self.__targets.append(neighbour)
+
+
+class ParityStrategy(HuntTargetStrategy):
+    """Hunts like `HuntTargetStrategy` but only on one tile out of two (as a checkerboard), since every boat longer than one tile covers both colours"""
+    def is_hunted(self, pos: tuple[int, int]) -> bool:
+        return (pos[0] + pos[1]) % 2 == 0
+
+
+def placement_coverage(blocked, hits, length: int, hit_weight: int):
+    """Returns, for each tile of the given lines, the weighted number of the placements of a boat of the given length along the lines that cover it. Computed with cumulative (i.e. sliding window) sums, without any Python loop over the tiles
+
+    Parameters
+    ----------
+
+    - blocked: a 2D numpy array, non-zero where no boat can be (missed or sunk tiles)
+
+    - hits: a 2D numpy array, non-zero where a boat not sunk yet has been hit
+
+    - length: the length of the boat
+
+    - hit_weight: the extra weight of a placement for each hit it covers"""
+    lines, n = blocked.shape
+    if length > n:
+        return np.zeros((lines, n), dtype=np.int64)
+    zeros = np.zeros((lines, 1), dtype=np.int64)
+    blocked_sums = np.concatenate((zeros, np.cumsum(blocked, axis=1, dtype=np.int64)), axis=1)
+    hit_sums = np.concatenate((zeros, np.cumsum(hits, axis=1, dtype=np.int64)), axis=1)
+    # weight of the placement starting at each position
+    weights = (blocked_sums[:, length:] == blocked_sums[:, :-length]) * (1 + hit_weight * (hit_sums[:, length:] - hit_sums[:, :-length]))
+    weight_sums = np.concatenate((zeros, np.cumsum(weights, axis=1)), axis=1)
+    # the placements covering the tile x start between x - length + 1 and x
+    positions = np.arange(n)
+    return weight_sums[:, np.minimum(positions, n - length) + 1] - weight_sums[:, np.maximum(positions - length + 1, 0)]
+
+
+class DensityStrategy(Strategy):
+    """Guesses the tile covered by the most legal placements of the boats not sunk yet. Placements covering hits are favoured so that hit boats are finished first.
+
+    The coverage of each boat length is kept for every line and every column and, after a guess, only the lines and the columns of the changed tiles are computed again. Requires numpy"""
+    HIT_WEIGHT: int = 50
+    """The extra weight of a placement for each hit it covers"""
+
+    def __init__(self, size: tuple[int, int], rng: random.Random, fleet: tuple[int, ...]) -> None:
+        if np is None:
+            raise ImportError("The density strategy requires numpy")
+        super().__init__(size, rng, fleet)
+        width, height = size
+        self.__blocked = np.zeros((height, width), dtype=np.int8)
+        """Where no boat can be: missed and sunk tiles"""
+        self.__hits = np.zeros((height, width), dtype=np.int8)
+        """Where boats not sunk yet have been hit"""
+        self.__guessed = np.zeros((height, width), dtype=np.bool_)
+        self.__remaining: Counter[int] = Counter(fleet)
+        """The number of boats not sunk yet of each length"""
+        self.__horizontal: dict[int, np.ndarray] = {}
+        """The coverage of the horizontal placements of each length, of shape `(height, width)`"""
+        self.__vertical: dict[int, np.ndarray] = {}
+        """The coverage of the vertical placements of each length, transposed, i.e. of shape `(width, height)`"""
+        self.__density = np.zeros((height, width), dtype=np.int64)
+        for length, count in self.__remaining.items():
+            self.__horizontal[length] = placement_coverage(self.__blocked, self.__hits, length, self.HIT_WEIGHT)
+            self.__vertical[length] = placement_coverage(self.__blocked.T, self.__hits.T, length, self.HIT_WEIGHT)
+            self.__density += count * (self.__horizontal[length] + self.__vertical[length].T)
+
+    def density(self):
+        """Returns the weighted number of placements covering each tile, of shape `(height, width)`"""
+        return self.__density.copy()
+
+    def next_guess(self) -> tuple[int, int]:
+        scores = np.where(self.__guessed, -1, self.__density)
+        best = np.flatnonzero(scores == scores.max())
+        y, x = divmod(int(best[self.rng.randrange(len(best))]), self.size[0])
+        if self.__guessed[y, x]:
+            raise IndexError("Every tile has already been guessed")
+        return (x, y)
+
+    def observe(self, pos: tuple[int, int], hit: bool, sunk: Optional[set[tuple[int, int]]]) -> None:
+        super().observe(pos, hit, sunk)
+        x, y = pos
+        self.__guessed[y, x] = True
+        if hit:
+            self.__hits[y, x] = 1
+        else:
+            self.__blocked[y, x] = 1
+        changed: set[tuple[int, int]] = {pos}
+        if sunk is not None:
+            for sunk_x, sunk_y in sunk:
+                self.__hits[sunk_y, sunk_x] = 0
+                self.__blocked[sunk_y, sunk_x] = 1
+            changed |= sunk
+        lines: list[int] = sorted({y for x, y in changed})
+        columns: list[int] = sorted({x for x, y in changed})
+        for length, count in self.__remaining.items():
+            new = placement_coverage(self.__blocked[lines], self.__hits[lines], length, self.HIT_WEIGHT)
+            self.__density[lines] += count * (new - self.__horizontal[length][lines])
+            self.__horizontal[length][lines] = new
+            new = placement_coverage(self.__blocked.T[columns], self.__hits.T[columns], length, self.HIT_WEIGHT)
+            self.__density[:, columns] += count * (new - self.__vertical[length][columns]).T
+            self.__vertical[length][columns] = new
+        if sunk is not None and self.__remaining[len(sunk)] > 0:
+            # one boat of this length less to place
+            length: int = len(sunk)
+            self.__density -= self.__horizontal[length] + self.__vertical[length].T
+            self.__remaining[length] -= 1
+            if self.__remaining[length] == 0:
+                del self.__remaining[length]
+                del self.__horizontal[length]
+                del self.__vertical[length]
+
+
+STRATEGIES: dict[str, type[Strategy]] = {
+    "random": RandomStrategy,
+    "hunt": HuntTargetStrategy,
+    "parity": ParityStrategy,
+    "density": DensityStrategy,
+}
+"""The available strategies by name"""
+
+
+def play_game(board: Board, strategy: Strategy) -> int:
+    """Lets the given strategy guess the tiles of the given board until all its boats have been found and returns the number of guesses"""
+    guesses: int = 0
+    while not board.is_finished():
+        pos: tuple[int, int] = strategy.next_guess()
+        board.guess_tile(pos)
+        guesses += 1
+        boat_id: Optional[int] = board.boat_id_at(pos)
+        sunk: Optional[set[tuple[int, int]]] = None
+        if boat_id is not None and board.boats_view()[boat_id] == State.SEEN:
+            sunk = board.get_boat_tiles(boat_id)
+        strategy.observe(pos, boat_id is not None, sunk)
+    return guesses
+
+
+def play_games(strategy: str, seeds: range, size: tuple[int, int], fleet: tuple[int, ...], layout: Optional[Layout]) -> list[int]:
+    """Plays one game per given seed and returns the number of guesses of each of them. The layout is random for each game if none is given"""
+    results: list[int] = []
+    for seed in seeds:
+        rng: random.Random = random.Random(seed)
+        game_layout: Layout = layout if layout is not None else random_layout(size, fleet, rng)
+        game_fleet: tuple[int, ...] = tuple(len(tiles) for tiles in game_layout[1].values())
+        results.append(play_game(layout_board(game_layout), STRATEGIES[strategy](game_layout[0], rng, game_fleet)))
+    return results
+
+
+class Report:
+    """The results of a batch of games"""
+    def __init__(self, strategy: str, guesses: list[int], elapsed: float) -> None:
+        self.strategy: str = strategy
+        """The name of the strategy used"""
+        self.guesses: list[int] = guesses
+        """The number of guesses of each game, in order"""
+        self.elapsed: float = elapsed
+        """The time in seconds it took to play all the games"""
+
+    def __repr__(self) -> str:
+        return "\n".join([
+            f"strategy: {self.strategy}",
+            f"games: {len(self.guesses)} in {self.elapsed:.3f} s ({self.games_per_second():.1f} games/s)",
+            f"guesses: min {min(self.guesses)}, mean {statistics.fmean(self.guesses):.2f}, max {max(self.guesses)}",
+            "percentiles: " + ", ".join([f"p{p} {v}" for p, v in self.percentiles().items()]),
+        ])
+
+    def games_per_second(self) -> float:
+        """Returns the number of games played per second"""
+        return len(self.guesses) / self.elapsed if self.elapsed > 0 else float("inf")
+
+    def percentiles(self, points: tuple[int, ...] = (10, 25, 50, 75, 90, 99)) -> dict[int, int]:
+        """Returns the number of guesses under which the given percentages of the games have been finished"""
+        ordered: list[int] = sorted(self.guesses)
+        return {p: ordered[min(len(ordered) - 1, len(ordered) * p // 100)] for p in points}
+
+    def distribution(self) -> dict[int, int]:
+        """Returns how many games have been finished in each number of guesses"""
+        return dict(sorted(Counter(self.guesses).items()))
+
+
+def simulate(strategy: str, games: int, size: tuple[int, int] = (10, 10), fleet: tuple[int, ...] = (5, 4, 3, 3, 2), layout: Optional[Board] = None, workers: Optional[int] = None, seed: int = 0, chunk_size: Optional[int] = None) -> Report:
+    """Plays the given number of games without any display, spread over a pool of processes
+
+    Parameters
+    ----------
+
+    - strategy: the name of the strategy to use (see `STRATEGIES`)
+
+    - games: the number of games to play
+
+    - size: the width and the height of the boards when no layout is given
+
+    - fleet: the length of each boat when no layout is given
+
+    - layout: a board whose boats are used for every game. If none, each game has its own random layout
+
+    - workers: the number of processes to use (all the cores by default). With 1, games are played in the current process
+
+    - seed: the seed of the first game, the following games using the next ones. Reports are reproducible for a given seed whatever the number of workers
+
+    - chunk_size: the number of games sent to a process at once. By default, each worker gets about 4 chunks, so that the work stays balanced without sending every game on its own"""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}; available: {list(STRATEGIES)}")
+    fixed_layout: Optional[Layout] = None if layout is None else board_layout(layout)
+    if chunk_size is None:
+        chunk_size = max(1, ceil(games / ((workers or os.cpu_count() or 1) * 4)))
+    chunks: list[range] = [range(start, min(start + chunk_size, seed + games)) for start in range(seed, seed + games, chunk_size)]
+    start_time: float = time.perf_counter()
+    guesses: list[int] = []
+    if workers == 1:
+        for chunk in chunks:
+            guesses.extend(play_games(strategy, chunk, size, fleet, fixed_layout))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(play_games, strategy, chunk, size, fleet, fixed_layout) for chunk in chunks]
+            for future in futures:
+                guesses.extend(future.result())
+    return Report(strategy, guesses, time.perf_counter() - start_time)
+
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Plays battleship games without any display to compare guessing strategies")
+    parser.add_argument("--strategy", choices=list(STRATEGIES), default="parity", help="the guessing strategy (default: parity)")
+    parser.add_argument("--games", type=int, default=10000, help="the number of games to play (default: 10000)")
+    parser.add_argument("--size", type=int, nargs=2, default=(10, 10), metavar=("WIDTH", "HEIGHT"), help="the size of the boards (default: 10 10)")
+    parser.add_argument("--fleet", type=int, nargs="+", default=(5, 4, 3, 3, 2), metavar="LENGTH", help="the length of each boat (default: 5 4 3 3 2)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="the number of processes (default: the number of cores)")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the first game (default: 0)")
+    args: argparse.Namespace = parser.parse_args()
+    print(simulate(args.strategy, args.games, tuple(args.size), tuple(args.fleet), workers=args.workers, seed=args.seed))
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+from __future__ import annotations
+import argparse
+import random
+import shutil
+import sys
+
+from boardfile import load_board, read_header, save_board
+from classes import State, Board, Salvo
+from replay import Recorder
+from rules import BoardChanges, History, bomb_area, can_start, replace_fleet
+from typing import Mapping, Optional, TextIO
+
+
+# A text frontend drawing the board with ANSI escape sequences, for terminals without any display (e.g. over SSH) and for
+# scripted play. It never imports pygame (nor numpy unless a board file is loaded) so that it starts at once. Commands are
+# read line by line, so that they can also be piped from a file; with --plain, only the result of each command is written
+
+MENU_HELP: str = "boat X1 Y1 X2 Y2 | del X Y | add row/column | del row/column | r(andom) | z (undo) | y (redo) | view X Y | s(ave) | p(rint) | start | q(uit)"
+"""The commands of the menu"""
+GAME_HELP: str = "X Y (guess) | salvo X Y [X Y ...] | area X Y WIDTH HEIGHT | reveal | view X Y | s(ave) | p(rint) | q(uit)"
+"""The commands of the game"""
+BOAT_CODES: tuple[int, ...] = (196, 208, 226, 46, 51, 33, 129, 201)
+"""The colours of the boats, from the 256 colours of ANSI terminals"""
+RESET: str = "\x1b[0m"
+
+
+def boat_codes(boats: Mapping[int, State]) -> dict[int, str]:
+    """Returns the ANSI colour of each of the given boats based on their id (see `main.boat_colours`)"""
+    return {boat_id: f"38;5;{BOAT_CODES[index % len(BOAT_CODES)]}" for index, boat_id in enumerate(sorted(boats.keys()))}
+
+
+def tile_text(boat_id: Optional[int], state: State, super: bool, boats: Mapping[int, State], codes: Optional[dict[int, str]]) -> str:
+    """Returns the two characters showing a tile of the given boat (`None` if no boat) in the given state, following the colours of `main.state_colour`
+
+    Parameters
+    ----------
+
+    - boat_id: the id of the boat of the tile
+
+    - state: whether the tile has been seen
+
+    - super: whether all tiles are displayed (see `main.draw_board`)
+
+    - boats: the boats of the board (see `Board.boats_view`)
+
+    - codes: the ANSI colours of the boats (see `boat_codes`), or `None` for plain text"""
+    if not super and state == State.NOTSEEN:
+        char, code = ".", "90"
+    elif boat_id is None:
+        char, code = "~", "34"
+    elif super or boats[boat_id] == State.SEEN:
+        char, code = "#", codes[boat_id] if codes is not None else ""
+    else:
+        char, code = "X", "1;97"
+    return f"{char} " if codes is None else f"\x1b[{code}m{char}{RESET} "
+
+
+def board_text(board: Board, super: bool) -> str:
+    """Returns the given board as plain text, one line per line of tiles"""
+    boats: Mapping[int, State] = board.boats_view()
+    return "\n".join(["".join([tile_text(boat_id, state, super, boats, None) for boat_id, state in board.iter_row(y)]).rstrip() for y in range(board.size()[1])])
+
+
+class TerminalView(BoardChanges):
+    """Draws a board on an ANSI terminal, one line of the terminal per line of tiles, with a title line above and a status and a prompt lines below. Only the characters of the tiles that changed since the last frame are written again (see `rules.BoardChanges`)"""
+    def __init__(self, board: Board, output: TextIO, size: tuple[int, int]) -> None:
+        """Inits a view drawing the given board
+
+        Parameters
+        ----------
+
+        - board: the board to draw
+
+        - output: the terminal to write to
+
+        - size: the number of columns and of lines of the terminal"""
+        super().__init__(board)
+        self.__output: TextIO = output
+        self.__tiles: tuple[int, int] = (max(1, size[0] // 2), max(1, size[1] - 4))
+        """The number of tiles shown per line and per column. One line is left empty below the prompt so that entering a command never scrolls"""
+        self.__origin: tuple[int, int] = (0, 0)
+        """The top left tile shown"""
+        self.__shown: dict[tuple[int, int], str] = {}
+        """The characters shown for each visible tile"""
+        self.__codes: dict[int, str] = {}
+
+    def view(self, pos: tuple[int, int]) -> None:
+        """Shows the tiles from the given top left tile (under the form `(x, y)`) on"""
+        width, height = self.board().size()
+        self.__origin = (min(max(pos[0], 0), max(width - self.__tiles[0], 0)), min(max(pos[1], 0), max(height - self.__tiles[1], 0)))
+        self.invalidate()
+
+    def draw(self, super: bool, status: str) -> None:
+        """Writes the tiles that changed since the last frame, then the given status and the prompt
+
+        Parameters
+        ----------
+
+        - super: whether all tiles are displayed (see `main.draw_board`). Changing it draws the whole board again
+
+        - status: the result of the last command"""
+        board: Board = self.board()
+        boats: Mapping[int, State] = board.boats_view()
+        fleet_changed, dirty = self.next_frame(super)
+        if fleet_changed:
+            self.__codes = boat_codes(boats)
+        width, height = board.size()
+        left, top = self.__origin
+        right, bottom = min(left + self.__tiles[0], width), min(top + self.__tiles[1], height)
+        chunks: list[str] = []
+        if dirty is None:
+            # clears the screen and writes every visible line at once
+            chunks.append("\x1b[H\x1b[2J")
+            chunks.append(f"Battleship {width}x{height}, tiles ({left}, {top}) to ({right - 1}, {bottom - 1})\r\n")
+            self.__shown = {}
+            for y in range(top, bottom):
+                for x in range(left, right):
+                    self.__shown[(x, y)] = tile_text(board.boat_id_at((x, y)), board.state_at((x, y)), super, boats, self.__codes)
+                chunks.append("".join([self.__shown[(x, y)] for x in range(left, right)]) + "\r\n")
+        else:
+            for x, y in dirty:
+                if left <= x < right and top <= y < bottom:
+                    text: str = tile_text(board.boat_id_at((x, y)), board.state_at((x, y)), super, boats, self.__codes)
+                    if self.__shown.get((x, y)) != text:
+                        # moves the cursor to the tile (the first line and column being 1)
+                        chunks.append(f"\x1b[{y - top + 2};{2 * (x - left) + 1}H{text}")
+                        self.__shown[(x, y)] = text
+        chunks.append(f"\x1b[{self.__tiles[1] + 2};1H\x1b[2K{status}\r\n\x1b[2K> ")
+        self.__output.write("".join(chunks))
+        self.__output.flush()
+
+
+def position(words: list[str]) -> tuple[int, int]:
+    """Returns the position (under the form `(x, y)`) given by the first two of the given words. Raises a `ValueError` if they are not non-negative numbers, since the board would count negative ones from its end"""
+    if len(words) < 2:
+        raise ValueError("A position needs two numbers")
+    x, y = int(words[0]), int(words[1])
+    if x < 0 or y < 0:
+        raise ValueError(f"Positions cannot be negative; given: {(x, y)}")
+    return (x, y)
+
+
+def guess_result(board: Board, pos: tuple[int, int], seen: bool) -> str:
+    """Returns what the guess of the tile at the given position revealed, the tile having been already seen or not before"""
+    boat_id: Optional[int] = board.boat_id_at(pos)
+    if seen:
+        return f"{pos}: already guessed"
+    if boat_id is None:
+        return f"{pos}: miss"
+    if board.boats_view()[boat_id] == State.SEEN:
+        return f"{pos}: hit, boat {boat_id} sunk"
+    return f"{pos}: hit"
+
+
+def main(load: Optional[str] = None, save: str = "battleship.bsb", record: Optional[str] = None, seed: Optional[int] = None, bomb: int = 1, plain: Optional[bool] = None, input: TextIO = sys.stdin, output: TextIO = sys.stdout) -> None:
+    """Launches the game in a terminal, with the same rules as `main.main`
+
+    Parameters
+    ----------
+
+    - load: the path of a board file to start from. A board saved while being guessed resumes the game directly
+
+    - save: the path of the board file written by the save command
+
+    - record: the path of a replay log where to record every change of the board (see `replay.Recorder`)
+
+    - seed: the seed of the random fleets placed by the random command in the menu. If none, they differ at each launch
+
+    - bomb: the side of the square of tiles guessed by each guess, centred on the given tile (see `Board.guess_area`)
+
+    - plain: whether to only write the result of each command, without drawing the board. If none, it is the case when the output is not a terminal
+
+    - input: where the commands are read from, one per line
+
+    - output: where the board and the results are written"""
+    plain = plain if plain is not None else not output.isatty()
+    recorder: Optional[Recorder] = None
+    # the game board
+    board: Board = Board((8, 8)) if load is None else load_board(load)
+    view: Optional[TerminalView] = None if plain else TerminalView(board, output, shutil.get_terminal_size())
+    if view is not None:
+        # switches to the alternate screen, restored when leaving
+        output.write("\x1b[?1049h")
+    try:
+        if record is not None:
+            recorder = Recorder(board, record)
+        # whether the menu is finished
+        menu_end: bool = load is not None and read_header(load).is_started()
+        # whether the game is finished
+        game_end: bool = False
+        # the boards before each change made in the menu, for undo and redo
+        history: History = History()
+        # places the random fleets
+        rng: random.Random = random.Random(seed)
+        # the result of the last command
+        status: str = MENU_HELP if not menu_end else GAME_HELP
+        # whether all the boats are shown in the game
+        reveal: bool = False
+        # the number of guesses made
+        guesses: int = 0
+        while not game_end:
+            if view is not None:
+                view.draw(not menu_end or reveal, status)
+            else:
+                output.write(status + "\n")
+                output.flush()
+            line: str = input.readline()
+            if not line:
+                status = "game left"
+                break
+            words: list[str] = line.split()
+            if not words:
+                status = MENU_HELP if not menu_end else GAME_HELP
+                continue
+            command: str = words[0].lower()
+            try:
+                # ---------- COMMANDS OF BOTH ---------- #
+                if command in ("q", "quit", "exit"):
+                    status = "game left"
+                    break
+                elif command in ("s", "save"):
+                    try:
+                        save_board(board, save, menu_end)
+                        status = f"saved to {save}"
+                    except OSError as error:
+                        # the game goes on with the board in memory
+                        status = f"could not save to {save}: {error}"
+                elif command in ("p", "print"):
+                    if view is not None:
+                        view.invalidate()
+                        status = "board drawn again"
+                    else:
+                        status = board_text(board, not menu_end or reveal)
+                elif command == "view":
+                    if view is not None:
+                        view.view(position(words[1:]))
+                    status = f"viewing from {position(words[1:])}"
+                # ---------- MENU ---------- #
+                elif not menu_end:
+                    if command == "boat":
+                        start, end = position(words[1:3]), position(words[3:5])
+                        history.checkpoint(board)
+                        boat_id: int = board.place_boat(start, end)
+                        status = f"boat {boat_id} placed"
+                        if view is not None:
+                            view.invalidate()
+                    elif command == "add" and words[1:] in (["row"], ["column"]):
+                        history.checkpoint(board)
+                        if words[1] == "row":
+                            board.add_row()
+                        else:
+                            board.add_column()
+                        status = f"size: {board.size()}"
+                        if view is not None:
+                            view.invalidate()
+                    elif command == "del" and words[1:] in (["row"], ["column"]):
+                        # the board keeps at least one row and one column
+                        if board.size()[words[1] == "row"] > 1:
+                            history.checkpoint(board)
+                            if words[1] == "row":
+                                board.del_row()
+                            else:
+                                board.del_column()
+                        status = f"size: {board.size()}"
+                        if view is not None:
+                            view.invalidate()
+                    elif command == "del":
+                        boat_id: Optional[int] = board.boat_id_at(position(words[1:]))
+                        if boat_id is not None:
+                            # delete the selected boat
+                            history.checkpoint(board)
+                            board.del_boat(boat_id)
+                            if view is not None:
+                                view.invalidate()
+                        status = f"boat {boat_id} deleted" if boat_id is not None else "no boat there"
+                    elif command in ("r", "random"):
+                        status = "random fleet placed" if replace_fleet(board, rng, history) else "the fleet does not fit in the board"
+                        if view is not None:
+                            view.invalidate()
+                    elif command in ("z", "undo", "y", "redo"):
+                        # undo or redo the last change of the board
+                        restored: Optional[Board] = history.undo(board) if command in ("z", "undo") else history.redo(board)
+                        if restored is not None:
+                            board = restored
+                            if recorder is not None:
+                                recorder.attach(board)
+                            if view is not None:
+                                view.set_board(board)
+                        status = f"{command}: nothing to do" if restored is None else f"{command}: done"
+                    elif command == "start":
+                        if can_start(board):
+                            # end the menu and start the game
+                            menu_end = True
+                            status = GAME_HELP
+                            if view is not None:
+                                view.invalidate()
+                        else:
+                            status = "place at least one boat first"
+                    else:
+                        status = f"unknown command; {MENU_HELP}"
+                # ---------- GAME ---------- #
+                else:
+                    salvo: Optional[Salvo] = None
+                    if command == "reveal":
+                        reveal = not reveal
+                        status = "boats shown" if reveal else "boats hidden"
+                    elif command == "salvo" and len(words) % 2 == 1:
+                        salvo = board.guess_many([position(words[i:i + 2]) for i in range(1, len(words), 2)])
+                    elif command == "area":
+                        if len(words) < 5:
+                            raise ValueError("An area needs four numbers")
+                        # the area may start outside the board, only its part inside being guessed
+                        salvo = board.guess_area((int(words[1]), int(words[2]), int(words[3]), int(words[4])))
+                    elif command.lstrip("-").isdigit() and bomb > 1:
+                        salvo = board.guess_area(bomb_area(position(words), bomb))
+                    elif command.lstrip("-").isdigit():
+                        pos: tuple[int, int] = position(words)
+                        seen: bool = board.state_at(pos) == State.SEEN
+                        board.guess_tile(pos)
+                        guesses += 1
+                        status = guess_result(board, pos, seen)
+                        if view is not None:
+                            view.mark_guess(pos)
+                    else:
+                        status = f"unknown command; {GAME_HELP}"
+                    if salvo is not None:
+                        guesses += 1
+                        status = repr(salvo)
+                        if view is not None:
+                            view.mark_salvo(salvo)
+                    if board.is_finished():
+                        status = f"all the boats have been found in {guesses} guesses"
+                        game_end = True
+            except (IndexError, ValueError) as error:
+                status = f"invalid command: {error}"
+        if view is None:
+            output.write(status + "\n")
+    finally:
+        if recorder is not None:
+            recorder.close()
+        if view is not None:
+            # leaves the alternate screen, showing the last status (and the board if the game has been finished) in the main one
+            output.write("\x1b[?1049l" + (board_text(board, False) + "\n" if game_end else "") + status + "\n")
+            output.flush()
+
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="A minimalist one-sided battleship game in a terminal, without pygame")
+    parser.add_argument("--load", metavar="FILE", help="a board file to start from (see the save command)")
+    parser.add_argument("--save", metavar="FILE", default="battleship.bsb", help="the board file written by the save command (default: battleship.bsb)")
+    parser.add_argument("--record", metavar="FILE", help="a replay log where to record the menu and the game (see replay.py)")
+    parser.add_argument("--seed", type=int, help="the seed of the random fleets placed by the random command (default: random)")
+    parser.add_argument("--bomb", type=int, default=1, metavar="SIDE", help="each guess reveals a square of SIDE x SIDE tiles centred on the guessed tile (default: 1)")
+    parser.add_argument("--plain", action="store_true", default=None, help="only write the result of each command, e.g. for scripts (default when the output is not a terminal)")
+    args: argparse.Namespace = parser.parse_args()
+    main(args.load, args.save, args.record, args.seed, args.bomb, args.plain)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+from __future__ import annotations
+import itertools
+import os
+import random
+import tempfile
+import unittest
+
+from boardfile import dumps_board, load_board, loads_board, save_board
+from classes import State, Tile, Board
+from fleet import FLEET, place_fleet
+from replay import Recorder, Replay
+from typing import Callable
+
+
+# Checks that saving then loading a board, and recording then replaying its changes, give the same board whatever the
+# way its grid is stored. Runs with `python -m unittest` or `python -m pytest`
+
+BACKENDS: dict[str, dict[str, bool]] = {"tiles": {}, "packed": {"packed": True}, "sparse": {"sparse": True}}
+"""The keyword arguments of `Board` for each way of storing a grid"""
+
+
+def board_state(board: Board) -> tuple[tuple[int, int], dict[int, State], list[list[tuple]]]:
+    """Returns everything a board is made of: its size, its boats and the boat id and the state of each tile"""
+    return (board.size(), board.get_boats(), [list(board.iter_row(y)) for y in range(board.size()[1])])
+
+
+def play(board: Board, rng: random.Random, changed: Callable[[], None] = lambda: None) -> None:
+    """Changes the given board as a game would: places a fleet, edits it and guesses tiles, single ones and salvos. The given function is called after each change"""
+    width, height = board.size()
+    place_fleet(board, FLEET, rng)
+    changed()
+    highest: int = max(board.boats_view())
+    # placed over the boat of the highest id, which changes the id a new boat would get
+    board.place_boat(min(board.get_boat_tiles(highest)), min(board.get_boat_tiles(highest)))
+    changed()
+    board.place_boat((0, 0), (2, 0))
+    changed()
+    board.del_boat(min(board.boats_view()))
+    changed()
+    board.set_tile_at(Tile(None, State.SEEN), (width - 1, height - 1))
+    changed()
+    for i in range(20):
+        board.guess_tile((rng.randrange(width), rng.randrange(height)))
+        changed()
+    board.guess_many([(rng.randrange(width), rng.randrange(height)) for i in range(10)])
+    changed()
+    board.guess_area((rng.randrange(width), rng.randrange(height), 3, 3))
+    changed()
+
+
+class RoundTripTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_save_load(self) -> None:
+        for name, backend in BACKENDS.items():
+            with self.subTest(backend=name):
+                board: Board = Board((12, 9), **backend)
+                play(board, random.Random(1))
+                path: str = os.path.join(self.directory.name, f"{name}.bsb")
+                save_board(board, path)
+                self.assertEqual(board_state(loads_board(dumps_board(board))), board_state(board))
+                for mmap in (True, False):
+                    loaded: Board = load_board(path, mmap)
+                    self.assertTrue(loaded.is_packed())
+                    self.assertEqual(board_state(loaded), board_state(board))
+                    # the loaded board can be played on and saved again
+                    loaded.guess_area((0, 0, 12, 9))
+                    self.assertTrue(loaded.is_finished())
+                    save_board(loaded, path)
+                    self.assertEqual(board_state(load_board(path, mmap)), board_state(loaded))
+                    save_board(board, path)
+
+    def test_record_replay(self) -> None:
+        # with snapshots between most changes and with the first snapshot only
+        for (name, backend), interval in itertools.product(BACKENDS.items(), (7, 1000)):
+            with self.subTest(backend=name, interval=interval):
+                board: Board = Board((12, 9), **backend)
+                # the empty board, restored after the game as by undos
+                empty: Board = board.snapshot()
+                path: str = os.path.join(self.directory.name, f"{name}.bsrl")
+                # the state of the board after each number of events
+                states: dict[int, tuple] = {0: board_state(board)}
+                with Recorder(board, path, interval) as recorder:
+                    play(board, random.Random(2), lambda: states.__setitem__(recorder.events, board_state(board)))
+                    # another board followed from now on
+                    board = empty
+                    recorder.attach(board)
+                    states[recorder.events] = board_state(board)
+                    board.place_boat((1, 1), (1, 3))
+                    board.guess_area((0, 0, 12, 9))
+                    states[recorder.events] = board_state(board)
+                with Replay(path) as replay:
+                    self.assertEqual(replay.events, max(states))
+                    for event, state in states.items():
+                        self.assertEqual(board_state(replay.board_at(event)), state, f"after {event} events")
+                    self.assertTrue(replay.board_after(replay.moves).is_finished())
+                    # playing the events switches to the attached board
+                    played: Board = replay.board_at(0)
+                    attached: int = 0
+                    for event, args in replay.play():
+                        attached += event == "attach"
+                        played = replay.apply(played, event, args)
+                    self.assertEqual(attached, 1)
+                    self.assertEqual(board_state(played), states[replay.events])
+
+
+if __name__ == "__main__":
+    unittest.main()